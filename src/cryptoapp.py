@@ -1,17 +1,32 @@
-from flask import Flask, render_template, jsonify, request
+from flask import Flask, Response, render_template, jsonify, request
 
-from src.library.address import LockType, get_address_prefix
-from src.library.codec import der_decode, encode_base58check, encode_bech32
-from src.library.codec import der_encode, decompress_public_key
-from src.library.curves import CurveType, get_curve
-from src.library.data_formats import Data
-from src.library.ecc_keys import KeyPair
-from src.library.ecdsa import generate_signature, verify_signature
-from src.library.hash_functions import HashType, hash_function
+from src import handlers
+from src.executor import CryptoExecutor, ExecutorBusyError, TaskTimeoutError
+from src.handlers import curve_type, run_handler
+from src.library.hash_functions import hash_stream
 
 app = Flask(__name__)
-curve_type = CurveType.SECP256K1  # TODO: Enable multiple types
-curve = get_curve(curve_type)
+
+# CPU-bound crypto runs on the executor; configure with CRYPTOAPI_WORKERS, CRYPTOAPI_TASK_TIMEOUT, CRYPTOAPI_MAX_PENDING
+executor = CryptoExecutor.from_env(curve_types=(curve_type,))
+
+
+def handle(handler, *args):
+    """
+    Runs a shared handler (see handlers.py), with its tasks on the executor, and returns its JSON response.
+    """
+    body, status = run_handler(executor, handler, *args)
+    return jsonify(body), status
+
+
+@app.errorhandler(ExecutorBusyError)
+def executor_busy(error):
+    return jsonify({'error': str(error)}), 503
+
+
+@app.errorhandler(TaskTimeoutError)
+def task_timeout(error):
+    return jsonify({'error': str(error)}), 504
 
 
 # Serve the homepage
@@ -22,154 +37,135 @@ def home():
 
 @app.route('/generate_private_key', methods=['GET'])
 def generate_private_key():
-    private_key = KeyPair.generate_private_key(curve)
-    return jsonify({'private_key': str(private_key)})
+    return handle(handlers.generate_private_key)
 
 
 @app.route('/get_public_keys', methods=['POST'])
 def get_public_keys():
-    data = request.get_json()
-    private_key = int(data.get('private_key'))
+    return handle(handlers.get_public_keys, request.get_json())
+
 
-    # Get Public Keys
-    kp = KeyPair(private_key=private_key, curve_type=curve_type)
-    x, y = kp.public_key_point
-    cpk = kp.compressed_public_key
+# Endpoint for generating many keypairs, streamed as newline-delimited JSON
+@app.route('/generate_keypairs', methods=['POST'])
+def generate_keypairs_stream():
+    try:
+        tasks = handlers.keypair_tasks(request.get_json())
+    except ValueError as error:
+        return jsonify({'error': str(error)}), 400
 
-    return jsonify({
-        'public_key_x': str(x),
-        'public_key_y': str(y),
-        'compressed_public_key': cpk
-    })
+    def keypair_lines():
+        for task in tasks:
+            for keypair in executor.run(task.func, *task.args):
+                yield handlers.keypair_line(keypair)
+
+    return Response(keypair_lines(), mimetype='application/x-ndjson')
 
 
 # Endpoint for signing a message
 @app.route('/sign_message', methods=['POST'])
 def sign():
-    data = request.get_json()
-    private_key = int(data.get('private_key'))
-    message = Data(data.get('message'))
-
-    if not private_key or not message:
-        return jsonify({'error': 'Private key and message are required'}), 400
-
-    signature = generate_signature(private_key, message.hex, curve_type)
-
-    r, s = signature
-    der_sig = der_encode(r, s)
-
-    # Cast to str
-    return jsonify({
-        'r': str(r),
-        's': str(s),
-        'der': der_sig
-    })
+    return handle(handlers.sign_message, request.get_json())
 
 
 # Endpoint for verifying a signature
 @app.route('/verify_signature', methods=['POST'])
 def verify():
-    data = request.get_json()
-    message = Data(data.get('message'))
-    cpk = data.get('cpk')
-    sig_r = data.get('r')
-    sig_s = data.get('s')
-    der_encoded_sig = data.get('der_sig')
-
-    if (sig_r == "" or sig_s == "") and der_encoded_sig != "":
-        r, s = der_decode(der_encoded_sig)
-    elif sig_r != "" and sig_s != "":
-        r, s = int(sig_r), int(sig_s)
-    else:
-        raise ValueError(f"Missing one or more fields.")
+    return handle(handlers.verify_signature, request.get_json())
+
+
+# Endpoint for verifying many signatures at once
+@app.route('/verify_batch', methods=['POST'])
+def verify_batch():
+    return handle(handlers.verify_batch, request.get_json(), executor.workers)
 
-    public_key = decompress_public_key(cpk, curve_type)
-    signature = (r, s)
 
-    if not public_key or not message or not signature:
-        return jsonify({'error': 'Public key, message, and signature are required'}), 400
+# Endpoint for the signing self-check and public key cache counters of the process serving the request
+@app.route('/stats', methods=['GET'])
+def stats():
+    return handle(handlers.stats)
 
-    is_valid = verify_signature(signature, message.hex, public_key, curve_type)
-    print(f"IS VALID: {is_valid}")
-    return jsonify({'is_valid': is_valid})
+
+# Endpoint for counting the points of a curve y^2 = x^3 + ax + b over F_p
+@app.route('/curve_order', methods=['POST'])
+def curve_order():
+    return handle(handlers.curve_order, request.get_json())
 
 
 @app.route('/hash', methods=['POST'])
 def hash_sha256():
-    # Get input as hex string
-    data = request.get_json()
-    input_text = Data(data.get('input'))
+    return handle(handlers.hash_input, request.get_json())
+
+
+# Endpoint for hashing many inputs with one hash type; large inputs are hashed in parallel on threads
+@app.route('/hash_batch', methods=['POST'])
+def hash_batch():
+    return handle(handlers.hash_batch, request.get_json())
+
 
-    # Run all hash functions
-    sha256_hash = hash_function(input_text, HashType.SHA256)
-    hash256_hash = hash_function(input_text, HashType.HASH256)
-    ripemd160_hash = hash_function(input_text, HashType.RIPEMD160)
-    hash160_hash = hash_function(input_text, HashType.HASH160)
+# Endpoint for hashing a large input in one pass, from a raw (e.g. chunked) request body or a multipart upload
+@app.route('/hash_stream', methods=['POST'])
+def hash_stream_endpoint():
+    if request.mimetype == 'multipart/form-data':
+        upload = request.files.get('file')
+        if upload is None:
+            return jsonify({'error': 'A file upload named file is required'}), 400
+        hasher = hash_stream(upload.stream)
+    else:
+        hasher = hash_stream(request.stream)
 
-    return jsonify({
-        'sha256': sha256_hash,
-        'hash256': hash256_hash,
-        'ripemd160': ripemd160_hash,
-        'hash160': hash160_hash
-    })
+    return jsonify(handlers.hash_stream_result(hasher))
 
 
 @app.route('/encode_der', methods=['POST'])
 def encode_der():
-    data = request.get_json()
-    r = int(data.get('r', '0'))
-    s = int(data.get('s', '0'))
-
-    # Your existing DER encoding function here
-    der_encoded = der_encode(r, s)
-    return jsonify({'encoded_signature': der_encoded})
+    return handle(handlers.encode_der, request.get_json())
 
 
 @app.route('/decode_der', methods=['POST'])
 def decode_der():
-    data = request.get_json()
-    der_string = data.get('der_encoded_signature')
-
-    # Decode DER string
-    decoded_sig = der_decode(der_string)
-    r, s = decoded_sig
-    return jsonify({
-        "r": str(r),
-        "s": str(s)
-    })
+    return handle(handlers.decode_der, request.get_json())
 
 
 @app.route('/pubkeyhash', methods=['POST'])
 def hash_compressed_public_key():
-    data = request.get_json()
-    cpk = data.get('compressed_public_key')
-
-    cpk_data = Data(cpk)
-
-    pubkeyhash = hash_function(cpk_data, HashType.HASH160)
-    return jsonify({'pubkeyhash': pubkeyhash})
+    return handle(handlers.pubkeyhash, request.get_json())
 
 
 @app.route('/generate_bitcoin_address', methods=['POST'])
 def generate_bitcoin_address():
-    data = request.get_json()  # Data comes from generateBitcoinAddress() = {address-type, pubkey-hash}
-    address_type = data.get('address_type', 'legacy')
-    pubkey_hash = data.get('pub_key_hash')
+    return handle(handlers.generate_bitcoin_address, request.get_json())
 
-    print(data)
 
-    if not pubkey_hash:
-        return jsonify({'error': 'Public key hash required.'}), 400
+# Endpoint for generating many addresses at once; malformed hashes give null addresses
+@app.route('/generate_bitcoin_addresses', methods=['POST'])
+def generate_bitcoin_addresses():
+    return handle(handlers.generate_bitcoin_addresses, request.get_json())
+
+
+# Endpoint for decoding many Base58Check addresses at once; invalid addresses give null results
+@app.route('/decode_bitcoin_addresses', methods=['POST'])
+def decode_bitcoin_addresses():
+    return handle(handlers.decode_bitcoin_addresses, request.get_json())
+
+
+# Endpoint for the Merkle root of a block's txids, given in display order
+@app.route('/merkle_root', methods=['POST'])
+def merkle_root_endpoint():
+    return handle(handlers.merkle_root, request.get_json())
+
+
+# Endpoint for the inclusion proof of the txid at an index; the proof hashes are in display order, from the bottom
+@app.route('/merkle_proof', methods=['POST'])
+def merkle_proof_endpoint():
+    return handle(handlers.merkle_proof, request.get_json())
 
-    if address_type == "legacy":
-        address_prefix = get_address_prefix(LockType.P2PKH)
-        pubkey_data = Data(address_prefix + pubkey_hash)
-        address = encode_base58check(pubkey_data)
-    else:
-        address = encode_bech32(Data(pubkey_hash))
 
-    return jsonify({'bitcoin_address': address})
+# Endpoint for checking an inclusion proof against a Merkle root
+@app.route('/verify_merkle_proof', methods=['POST'])
+def verify_merkle_proof():
+    return handle(handlers.verify_merkle_proof, request.get_json())
 
 
 if __name__ == '__main__':
+    executor.start()
     app.run(debug=True)
@@ -0,0 +1,202 @@
+"""
+Async variant of cryptoapp.py, serving the same routes and JSON contracts.
+
+Handlers are coroutines that offload the crypto to the CryptoExecutor, so a single event loop can hold many
+concurrent connections while the work runs in worker processes. The route bodies are shared with cryptoapp.py (see
+handlers.py). Run it with an ASGI server, e.g.
+
+    hypercorn src.cryptoapp_async:app
+"""
+import asyncio
+import os
+
+from quart import Quart, Response, render_template, jsonify, request
+
+from src import handlers
+from src.executor import CryptoExecutor, ExecutorBusyError, TaskTimeoutError
+from src.handlers import curve_type, run_handler_async
+from src.library.hash_functions import HASH_CHUNK_SIZE, MultiHasher, hash_stream
+
+app = Quart(__name__)
+# Largest request body with a Content-Length (default 16 MiB); chunked bodies read by /hash_stream are not buffered
+app.config["MAX_CONTENT_LENGTH"] = int(os.environ.get("CRYPTOAPI_MAX_CONTENT_LENGTH", 16 * 1024 * 1024))
+
+# CPU-bound crypto runs on the executor; configure with CRYPTOAPI_WORKERS, CRYPTOAPI_TASK_TIMEOUT, CRYPTOAPI_MAX_PENDING
+executor = CryptoExecutor.from_env(curve_types=(curve_type,))
+
+
+async def handle(handler, *args):
+    """
+    Runs a shared handler (see handlers.py), awaiting its tasks on the executor, and returns its JSON response.
+    """
+    body, status = await run_handler_async(executor, handler, *args)
+    return jsonify(body), status
+
+
+@app.before_serving
+async def start_executor():
+    await asyncio.to_thread(executor.start)
+
+
+@app.after_serving
+async def shutdown_executor():
+    await asyncio.to_thread(executor.shutdown)
+
+
+@app.errorhandler(ExecutorBusyError)
+async def executor_busy(error):
+    return jsonify({'error': str(error)}), 503
+
+
+@app.errorhandler(TaskTimeoutError)
+async def task_timeout(error):
+    return jsonify({'error': str(error)}), 504
+
+
+# Serve the homepage
+@app.route('/')
+async def home():
+    return await render_template('index.html')
+
+
+@app.route('/generate_private_key', methods=['GET'])
+async def generate_private_key():
+    return await handle(handlers.generate_private_key)
+
+
+@app.route('/get_public_keys', methods=['POST'])
+async def get_public_keys():
+    return await handle(handlers.get_public_keys, await request.get_json())
+
+
+# Endpoint for generating many keypairs, streamed as newline-delimited JSON
+@app.route('/generate_keypairs', methods=['POST'])
+async def generate_keypairs_stream():
+    try:
+        tasks = handlers.keypair_tasks(await request.get_json())
+    except ValueError as error:
+        return jsonify({'error': str(error)}), 400
+
+    async def keypair_lines():
+        for task in tasks:
+            for keypair in await executor.run_async(task.func, *task.args):
+                yield handlers.keypair_line(keypair)
+
+    return Response(keypair_lines(), mimetype='application/x-ndjson')
+
+
+# Endpoint for signing a message
+@app.route('/sign_message', methods=['POST'])
+async def sign():
+    return await handle(handlers.sign_message, await request.get_json())
+
+
+# Endpoint for verifying a signature
+@app.route('/verify_signature', methods=['POST'])
+async def verify():
+    return await handle(handlers.verify_signature, await request.get_json())
+
+
+# Endpoint for verifying many signatures at once
+@app.route('/verify_batch', methods=['POST'])
+async def verify_batch():
+    return await handle(handlers.verify_batch, await request.get_json(), executor.workers)
+
+
+# Endpoint for the signing self-check and public key cache counters of the process serving the request
+@app.route('/stats', methods=['GET'])
+async def stats():
+    return await handle(handlers.stats)
+
+
+# Endpoint for counting the points of a curve y^2 = x^3 + ax + b over F_p
+@app.route('/curve_order', methods=['POST'])
+async def curve_order():
+    return await handle(handlers.curve_order, await request.get_json())
+
+
+@app.route('/hash', methods=['POST'])
+async def hash_sha256():
+    return await handle(handlers.hash_input, await request.get_json())
+
+
+# Endpoint for hashing many inputs with one hash type; large inputs are hashed in parallel on threads
+@app.route('/hash_batch', methods=['POST'])
+async def hash_batch():
+    return await handle(handlers.hash_batch, await request.get_json())
+
+
+# Endpoint for hashing a large input in one pass, from a raw (e.g. chunked) request body or a multipart upload
+@app.route('/hash_stream', methods=['POST'])
+async def hash_stream_endpoint():
+    if request.mimetype == 'multipart/form-data':
+        upload = (await request.files).get('file')
+        if upload is None:
+            return jsonify({'error': 'A file upload named file is required'}), 400
+        hasher = await asyncio.to_thread(hash_stream, upload.stream)
+    else:
+        # Hash the body as it arrives, in chunks of HASH_CHUNK_SIZE on a worker thread
+        hasher = MultiHasher()
+        buffer = bytearray()
+        async for chunk in request.body:
+            buffer += chunk
+            if len(buffer) >= HASH_CHUNK_SIZE:
+                full, buffer = buffer, bytearray()
+                await asyncio.to_thread(hasher.update, full)
+        hasher.update(buffer)
+
+    return jsonify(handlers.hash_stream_result(hasher))
+
+
+@app.route('/encode_der', methods=['POST'])
+async def encode_der():
+    return await handle(handlers.encode_der, await request.get_json())
+
+
+@app.route('/decode_der', methods=['POST'])
+async def decode_der():
+    return await handle(handlers.decode_der, await request.get_json())
+
+
+@app.route('/pubkeyhash', methods=['POST'])
+async def hash_compressed_public_key():
+    return await handle(handlers.pubkeyhash, await request.get_json())
+
+
+@app.route('/generate_bitcoin_address', methods=['POST'])
+async def generate_bitcoin_address():
+    return await handle(handlers.generate_bitcoin_address, await request.get_json())
+
+
+# Endpoint for generating many addresses at once; malformed hashes give null addresses
+@app.route('/generate_bitcoin_addresses', methods=['POST'])
+async def generate_bitcoin_addresses():
+    return await handle(handlers.generate_bitcoin_addresses, await request.get_json())
+
+
+# Endpoint for decoding many Base58Check addresses at once; invalid addresses give null results
+@app.route('/decode_bitcoin_addresses', methods=['POST'])
+async def decode_bitcoin_addresses():
+    return await handle(handlers.decode_bitcoin_addresses, await request.get_json())
+
+
+# Endpoint for the Merkle root of a block's txids, given in display order
+@app.route('/merkle_root', methods=['POST'])
+async def merkle_root_endpoint():
+    return await handle(handlers.merkle_root, await request.get_json())
+
+
+# Endpoint for the inclusion proof of the txid at an index; the proof hashes are in display order, from the bottom
+@app.route('/merkle_proof', methods=['POST'])
+async def merkle_proof_endpoint():
+    return await handle(handlers.merkle_proof, await request.get_json())
+
+
+# Endpoint for checking an inclusion proof against a Merkle root
+@app.route('/verify_merkle_proof', methods=['POST'])
+async def verify_merkle_proof():
+    return await handle(handlers.verify_merkle_proof, await request.get_json())
+
+
+if __name__ == '__main__':
+    app.run(debug=True)
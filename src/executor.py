@@ -0,0 +1,191 @@
+"""
+Execution backend for CPU-bound crypto endpoints.
+
+Big-integer arithmetic holds the GIL, so running tasks in the request thread serialises all requests. The
+CryptoExecutor dispatches tasks to a pool of worker processes instead, each pre-warmed with the curve contexts and
+tables it needs, so throughput scales with the number of cores.
+"""
+import asyncio
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, TimeoutError
+
+from src.library.curves import CurveType
+from src.library.ecdsa import DEFAULT_CHECK_RATE, VerificationPolicy
+from src.library.key_cache import KEY_CACHE_SIZE
+from src.tasks import stop_nonce_pools, warm_up
+
+
+class ExecutorBusyError(RuntimeError):
+    """Raised when the number of pending tasks has reached the configured limit."""
+
+
+class TaskTimeoutError(RuntimeError):
+    """Raised when a task does not complete within the configured timeout."""
+
+
+class CryptoExecutor:
+
+    def __init__(self, workers: int = 0, timeout: float = 30.0, max_pending: int | None = None,
+                 curve_types: tuple = (CurveType.SECP256K1,), nonce_pool_size: int = 0,
+                 verification_policy: VerificationPolicy | None = None, key_cache_size: int = 0,
+                 table_dir: str | None = None):
+        """
+        We run tasks in a pool of worker processes.
+
+        workers : the number of worker processes. With 0 workers, tasks run inline in the calling thread.
+        timeout : the number of seconds to wait for a task result.
+        max_pending : the maximum number of tasks submitted but not yet completed (default: 4 per worker). Further
+            submissions are rejected with an ExecutorBusyError rather than queued without bound. With no workers,
+            the limit applies to the tasks that run_async runs on threads.
+        curve_types : the curves whose contexts and tables are built in each worker on startup.
+        nonce_pool_size : if positive, each worker keeps a background-filled pool of this many signing nonces per
+            curve, so signing needs no scalar multiplication on the request path.
+        verification_policy : the signing self-check policy for the workers (default: the library default).
+        key_cache_size : if positive, each worker caches this many decompressed public keys per curve, with
+            precomputed tables for the most used keys.
+        table_dir : a directory of table files (see table_store), memory-mapped by each worker instead of building
+            the generator tables, so that workers start faster and share the tables' pages.
+        """
+        self.workers = workers
+        self.timeout = timeout
+        self.max_pending = max_pending if max_pending is not None else 4 * max(workers, 1)
+        self.curve_types = tuple(curve_types)
+        self.nonce_pool_size = nonce_pool_size
+        self.verification_policy = verification_policy
+        self.key_cache_size = key_cache_size
+        self.table_dir = table_dir
+        self._warm_up_args = (self.curve_types, nonce_pool_size, verification_policy, key_cache_size, table_dir)
+
+        self._pending = threading.BoundedSemaphore(self.max_pending)
+        self._pool = None
+        self._threads = None  # Runs the tasks of run_async when there are no workers
+        if workers > 0:
+            self._pool = ProcessPoolExecutor(max_workers=workers, initializer=warm_up, initargs=self._warm_up_args)
+        else:
+            # The app module may be imported by a server that forks its workers afterwards (e.g. gunicorn --preload),
+            # so the nonce pools start filling at the first signature rather than on import
+            warm_up(*self._warm_up_args, start_nonce_pools=False)
+
+    @classmethod
+    def from_env(cls, curve_types: tuple = (CurveType.SECP256K1,)):
+        """
+        Returns an executor configured from the environment variables CRYPTOAPI_WORKERS (default 0),
+        CRYPTOAPI_TASK_TIMEOUT (seconds, default 30), CRYPTOAPI_MAX_PENDING (default 4 per worker),
+        CRYPTOAPI_NONCE_POOL (nonces per curve, default 0 for no pool), CRYPTOAPI_SIGN_CHECK (off, sampled or always;
+        default sampled), CRYPTOAPI_SIGN_CHECK_RATE (default DEFAULT_CHECK_RATE), CRYPTOAPI_KEY_CACHE (public keys
+        per curve, default KEY_CACHE_SIZE; 0 disables the cache) and CRYPTOAPI_TABLE_DIR (directory of table files,
+        default none).
+        """
+        workers = int(os.environ.get("CRYPTOAPI_WORKERS", "0"))
+        timeout = float(os.environ.get("CRYPTOAPI_TASK_TIMEOUT", "30"))
+        max_pending = os.environ.get("CRYPTOAPI_MAX_PENDING")
+        nonce_pool_size = int(os.environ.get("CRYPTOAPI_NONCE_POOL", "0"))
+        verification_policy = VerificationPolicy(
+            os.environ.get("CRYPTOAPI_SIGN_CHECK", "sampled"),
+            float(os.environ.get("CRYPTOAPI_SIGN_CHECK_RATE", DEFAULT_CHECK_RATE))
+        )
+        key_cache_size = int(os.environ.get("CRYPTOAPI_KEY_CACHE", KEY_CACHE_SIZE))
+        table_dir = os.environ.get("CRYPTOAPI_TABLE_DIR") or None
+        return cls(workers, timeout, int(max_pending) if max_pending else None, curve_types, nonce_pool_size,
+                   verification_policy, key_cache_size, table_dir)
+
+    def start(self):
+        """
+        Starts every worker process now rather than on demand, so no request pays for a cold worker.
+        """
+        if self._pool is not None:
+            futures = [self._pool.submit(warm_up, *self._warm_up_args) for _ in range(self.workers)]
+            for future in futures:
+                future.result()
+
+    def submit(self, func, *args):
+        """
+        Submits func(*args) to the pool and returns its Future. Raises an ExecutorBusyError if max_pending tasks are
+        already in flight.
+        """
+        if self._pool is None:
+            raise RuntimeError("Tasks run inline when the executor has no workers")
+        return self._submit_to(self._pool, func, *args)
+
+    def _submit_to(self, pool, func, *args):
+        """
+        Submits func(*args) to the pool, holding one of the max_pending slots until the task completes.
+        """
+        if not self._pending.acquire(blocking=False):
+            raise ExecutorBusyError(f"Too many pending tasks (limit {self.max_pending})")
+        try:
+            future = pool.submit(func, *args)
+        except BaseException:
+            self._pending.release()
+            raise
+        future.add_done_callback(lambda _: self._pending.release())
+        return future
+
+    def run(self, func, *args):
+        """
+        Returns func(*args), computed in a worker process if we have any. Raises a TaskTimeoutError if the result is
+        not ready within the timeout. A task that is already running cannot be interrupted, so it still counts
+        against max_pending until it completes.
+        """
+        if self._pool is None:
+            return func(*args)
+
+        future = self.submit(func, *args)
+        try:
+            return future.result(timeout=self.timeout)
+        except TimeoutError:
+            future.cancel()
+            raise TaskTimeoutError(f"Task did not complete within {self.timeout} seconds")
+
+    def run_all(self, calls: list) -> list:
+        """
+        Returns [func(*args) for func, args in calls], computed concurrently in the worker processes if we have any.
+        Raises a TaskTimeoutError if the results are not all ready within the timeout.
+        """
+        if self._pool is None:
+            return [func(*args) for func, args in calls]
+
+        futures = []
+        try:
+            for func, args in calls:
+                futures.append(self.submit(func, *args))
+            deadline = time.monotonic() + self.timeout
+            return [future.result(timeout=max(deadline - time.monotonic(), 0)) for future in futures]
+        except TimeoutError:
+            raise TaskTimeoutError(f"Tasks did not complete within {self.timeout} seconds")
+        finally:
+            for future in futures:
+                future.cancel()
+
+    async def run_async(self, func, *args):
+        """
+        Coroutine version of run for the async app. The event loop is never blocked: with no workers the task runs on
+        a thread pool, otherwise we await the worker process result. Either way, many such coroutines can be awaited
+        concurrently, up to max_pending.
+        """
+        if self._pool is None:
+            if self._threads is None:
+                self._threads = ThreadPoolExecutor(thread_name_prefix="crypto-task")
+            future = self._submit_to(self._threads, func, *args)
+        else:
+            future = self.submit(func, *args)
+        try:
+            return await asyncio.wait_for(asyncio.wrap_future(future), self.timeout)
+        except asyncio.TimeoutError:
+            raise TaskTimeoutError(f"Task did not complete within {self.timeout} seconds")
+
+    async def run_all_async(self, calls: list) -> list:
+        """
+        Coroutine version of run_all, awaiting the tasks concurrently.
+        """
+        return list(await asyncio.gather(*[self.run_async(func, *args) for func, args in calls]))
+
+    def shutdown(self):
+        if self._pool is not None:
+            self._pool.shutdown(wait=True, cancel_futures=True)
+        else:
+            if self._threads is not None:
+                self._threads.shutdown(wait=True, cancel_futures=True)
+            stop_nonce_pools()
@@ -0,0 +1,382 @@
+"""
+Route handlers shared by the Flask and async apps, so both serve the same JSON contracts with the same code.
+
+A handler takes the request JSON and returns the response body, or (body, status). Handlers never run expensive work
+themselves: they yield it, as a Task for the CryptoExecutor, a list of Tasks to run concurrently, or a Call for any
+other CPU-bound function, and receive the result (or have the exception raised) at the yield. cryptoapp.py drives a
+handler with run_handler, which runs the work with the executor and inline; cryptoapp_async.py drives it with
+run_handler_async, which awaits the executor and runs calls on a thread, so the event loop never blocks.
+"""
+import asyncio
+import inspect
+import json
+from typing import Callable, NamedTuple
+
+from src.executor import CryptoExecutor
+from src.library.address import LockType, decode_base58_addresses, encode_base58_addresses, \
+    encode_segwit_addresses, get_address_prefix
+from src.library.codec import der_decode, der_encode, encode_base58check, encode_bech32
+from src.library.curves import CurveType, get_curve
+from src.library.data_formats import Data
+from src.library.ecc_keys import KeyPair, KEYPAIR_CHUNK_SIZE
+from src.library.hash_functions import HashType, MultiHasher, hash_all, hash_function, hash_many
+from src.library.merkle import merkle_proof as build_merkle_proof, merkle_root as build_merkle_root, txid_to_hex, \
+    verify_proof
+from src.parsing import parse_batch_items, parse_curve_parameters, parse_hash_batch, parse_leaf_index, \
+    parse_merkle_proof, parse_pubkey_hashes, parse_signature, parse_txids
+from src.tasks import curve_order_task, keypairs_task, public_keys_task, sign_task, stats_task, verify_batch_task, \
+    verify_task
+
+VERIFY_CHUNK_SIZE = 64  # Smallest slice of a /verify_batch request sent to a single worker
+KEYPAIRS_MAX_COUNT = 1_000_000  # Largest /generate_keypairs request
+
+curve_type = CurveType.SECP256K1  # TODO: Enable multiple types
+curve = get_curve(curve_type)
+
+
+class Task(NamedTuple):
+    """A task for the CryptoExecutor: func(*args), where func is a picklable function from tasks.py."""
+    func: Callable
+    args: tuple
+
+
+class Call(NamedTuple):
+    """A CPU-bound call func(*args) outside the executor, run on a thread by the async app."""
+    func: Callable
+    args: tuple
+
+
+# --- Drivers --- #
+
+def run_handler(executor: CryptoExecutor, handler: Callable, *args) -> tuple:
+    """
+    Runs the handler, with its tasks on the executor and its calls inline, and returns (body, status).
+    """
+    work = handler(*args)
+    if not inspect.isgenerator(work):
+        return _response(work)
+
+    result, error = None, None
+    while True:
+        try:
+            request = work.send(result) if error is None else work.throw(error)
+        except StopIteration as stop:
+            return _response(stop.value)
+        try:
+            if isinstance(request, Task):
+                result = executor.run(request.func, *request.args)
+            elif isinstance(request, Call):
+                result = request.func(*request.args)
+            else:
+                result = executor.run_all(request)
+            error = None
+        except Exception as exc:
+            result, error = None, exc
+
+
+async def run_handler_async(executor: CryptoExecutor, handler: Callable, *args) -> tuple:
+    """
+    Coroutine version of run_handler: tasks are awaited on the executor and calls run on a thread.
+    """
+    work = handler(*args)
+    if not inspect.isgenerator(work):
+        return _response(work)
+
+    result, error = None, None
+    while True:
+        try:
+            request = work.send(result) if error is None else work.throw(error)
+        except StopIteration as stop:
+            return _response(stop.value)
+        try:
+            if isinstance(request, Task):
+                result = await executor.run_async(request.func, *request.args)
+            elif isinstance(request, Call):
+                result = await asyncio.to_thread(request.func, *request.args)
+            else:
+                result = await executor.run_all_async(request)
+            error = None
+        except Exception as exc:
+            result, error = None, exc
+
+
+def _response(result) -> tuple:
+    return result if isinstance(result, tuple) else (result, 200)
+
+
+# --- Keys and signatures --- #
+
+def generate_private_key():
+    private_key = KeyPair.generate_private_key(curve)
+    return {'private_key': str(private_key)}
+
+
+def get_public_keys(data: dict):
+    private_key = int(data.get('private_key'))
+
+    # Get Public Keys
+    (x, y), cpk = yield Task(public_keys_task, (private_key, curve_type))
+
+    return {
+        'public_key_x': str(x),
+        'public_key_y': str(y),
+        'compressed_public_key': cpk
+    }
+
+
+def keypair_tasks(data: dict):
+    """
+    Returns an iterator over the Tasks of a /generate_keypairs request, one per KEYPAIR_CHUNK_SIZE keypairs, built as
+    the response is streamed. The count and start are checked first: raises a ValueError if the count is not in
+    [1, KEYPAIRS_MAX_COUNT] or the keys would leave [1, n-1].
+    """
+    count = int(data.get('count', 0))
+    start = data.get('start')
+    start = int(start) if start not in (None, "") else None
+
+    if count <= 0:
+        raise ValueError('A positive count is required')
+    if count > KEYPAIRS_MAX_COUNT:
+        raise ValueError(f'At most {KEYPAIRS_MAX_COUNT} keypairs can be generated per request')
+    if start is not None and not (1 <= start and start + count <= curve.order):
+        raise ValueError('Incremental private keys must lie in the interval [1, n-1]')
+
+    return (
+        Task(keypairs_task, (min(KEYPAIR_CHUNK_SIZE, count - offset), curve_type,
+                             start + offset if start is not None else None))
+        for offset in range(0, count, KEYPAIR_CHUNK_SIZE)
+    )
+
+
+def keypair_line(keypair: tuple) -> str:
+    """
+    Returns a keypair (private_key, public_key_point, compressed_public_key) as a line of newline-delimited JSON.
+    """
+    private_key, (x, y), cpk = keypair
+    return json.dumps({
+        'private_key': str(private_key),
+        'public_key_x': str(x),
+        'public_key_y': str(y),
+        'compressed_public_key': cpk
+    }) + "\n"
+
+
+def sign_message(data: dict):
+    private_key = int(data.get('private_key'))
+    message = Data(data.get('message'))
+
+    if not private_key or not message:
+        return {'error': 'Private key and message are required'}, 400
+
+    r, s, recovery_id = yield Task(sign_task, (private_key, message.hex, curve_type))
+    der_sig = der_encode(r, s)
+
+    # Cast to str
+    return {
+        'r': str(r),
+        's': str(s),
+        'der': der_sig,
+        'recovery_id': recovery_id
+    }
+
+
+def verify_signature(data: dict):
+    message = Data(data.get('message'))
+    cpk = data.get('cpk')
+    r, s = parse_signature(data)
+    signature = (r, s)
+
+    if not cpk or not message or not signature:
+        return {'error': 'Public key, message, and signature are required'}, 400
+
+    is_valid = yield Task(verify_task, (signature, message.hex, cpk, curve_type))
+    return {'is_valid': is_valid}
+
+
+def verify_batch(data: dict, workers: int):
+    signatures = data.get('signatures')
+
+    if not signatures:
+        return {'error': 'A list of signatures is required'}, 400
+
+    # Malformed entries are reported as invalid
+    results = [False] * len(signatures)
+    indices, items = parse_batch_items(signatures)
+
+    # Split the batch across the workers and verify the chunks concurrently
+    chunk_size = max(VERIFY_CHUNK_SIZE, -(-len(items) // max(workers, 1)))
+    chunk_results = yield [
+        Task(verify_batch_task, (items[i:i + chunk_size], curve_type)) for i in range(0, len(items), chunk_size)
+    ]
+
+    verified = [is_valid for chunk_result in chunk_results for is_valid in chunk_result]
+    for index, is_valid in zip(indices, verified):
+        results[index] = is_valid
+
+    return {
+        'results': results,
+        'all_valid': all(results)
+    }
+
+
+def stats():
+    return (yield Task(stats_task, ()))
+
+
+def curve_order(data: dict):
+    try:
+        a, b, p = parse_curve_parameters(data)
+        order = yield Task(curve_order_task, (a, b, p))
+    except ValueError as error:
+        return {'error': str(error)}, 400
+    except ArithmeticError as error:
+        # The randomised order search failed; the request was valid, so another attempt may succeed
+        return {'error': f"Could not count the points: {error}"}, 422
+
+    return {
+        'order': str(order),
+        'trace': str(p + 1 - order)
+    }
+
+
+# --- Hashing --- #
+
+def hash_input(data: dict):
+    # Get input as hex string
+    input_text = Data(data.get('input'))
+
+    # Run all hash functions in a single pass
+    return (yield Call(hash_all, (input_text,)))
+
+
+def hash_batch(data: dict):
+    try:
+        items, hashtype = parse_hash_batch(data)
+    except ValueError as error:
+        return {'error': str(error)}, 400
+
+    digests = yield Call(hash_many, (items, hashtype))
+    return {'results': [digest.hex() for digest in digests]}
+
+
+def hash_stream_result(hasher: MultiHasher) -> dict:
+    return {**hasher.hexdigests(), 'size': hasher.size}
+
+
+def pubkeyhash(data: dict):
+    cpk = data.get('compressed_public_key')
+
+    cpk_data = Data(cpk)
+
+    pubkeyhash = hash_function(cpk_data, HashType.HASH160)
+    return {'pubkeyhash': pubkeyhash}
+
+
+# --- Encoding and addresses --- #
+
+def encode_der(data: dict):
+    r = int(data.get('r', '0'))
+    s = int(data.get('s', '0'))
+
+    der_encoded = der_encode(r, s)
+    return {'encoded_signature': der_encoded}
+
+
+def decode_der(data: dict):
+    der_string = data.get('der_encoded_signature')
+
+    # Decode DER string
+    r, s = der_decode(der_string)
+    return {
+        "r": str(r),
+        "s": str(s)
+    }
+
+
+def generate_bitcoin_address(data: dict):
+    # Data comes from generateBitcoinAddress() = {address-type, pubkey-hash}
+    address_type = data.get('address_type', 'legacy')
+    pubkey_hash = data.get('pub_key_hash')
+
+    if not pubkey_hash:
+        return {'error': 'Public key hash required.'}, 400
+
+    if address_type == "legacy":
+        address_prefix = get_address_prefix(LockType.P2PKH)
+        pubkey_data = Data(address_prefix + pubkey_hash)
+        address = encode_base58check(pubkey_data)
+    else:
+        address = encode_bech32(Data(pubkey_hash))
+
+    return {'bitcoin_address': address}
+
+
+def generate_bitcoin_addresses(data: dict):
+    address_type = data.get('address_type', 'legacy')
+    pubkey_hashes = data.get('pub_key_hashes')
+
+    if not pubkey_hashes or not isinstance(pubkey_hashes, list):
+        return {'error': 'A list of public key hashes is required.'}, 400
+
+    hashes = parse_pubkey_hashes(pubkey_hashes)
+    if address_type == "legacy":
+        addresses = yield Call(encode_base58_addresses, (hashes, LockType.P2PKH))
+    else:
+        addresses = yield Call(encode_segwit_addresses, (hashes,))
+
+    return {'bitcoin_addresses': addresses}
+
+
+def decode_bitcoin_addresses(data: dict):
+    addresses = data.get('addresses')
+
+    if not addresses or not isinstance(addresses, list):
+        return {'error': 'A list of addresses is required.'}, 400
+
+    decoded_addresses = yield Call(decode_base58_addresses, (addresses,))
+    return {'results': [
+        None if decoded is None else {'prefix': decoded[0], 'pub_key_hash': decoded[1]}
+        for decoded in decoded_addresses
+    ]}
+
+
+# --- Merkle trees --- #
+
+def merkle_root(data: dict):
+    txids = data.get('txids')
+
+    try:
+        root = yield Call(build_merkle_root, (parse_txids(txids),))
+    except ValueError as error:
+        return {'error': str(error)}, 400
+
+    return {
+        'merkle_root': txid_to_hex(root),
+        'count': len(txids)
+    }
+
+
+def merkle_proof(data: dict):
+    txids = data.get('txids')
+
+    try:
+        index = parse_leaf_index(data)
+        root, proof = yield Call(build_merkle_proof, (parse_txids(txids), index))
+    except ValueError as error:
+        return {'error': str(error)}, 400
+
+    return {
+        'merkle_root': txid_to_hex(root),
+        'txid': txids[index],
+        'index': index,
+        'proof': [txid_to_hex(sibling) for sibling in proof]
+    }
+
+
+def verify_merkle_proof(data: dict):
+    try:
+        txid, index, proof, root = parse_merkle_proof(data)
+    except ValueError as error:
+        return {'error': str(error)}, 400
+
+    return {'is_valid': verify_proof(txid, index, proof, root)}
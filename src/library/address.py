@@ -1,6 +1,9 @@
 """
 Methods for generating an Address
 """
+from src.library import base58, bech32
+
+BASE58_PAYLOAD_LENGTH = 21  # Version byte and 20-byte hash
 
 
 class LockType:
@@ -22,6 +25,36 @@ def get_address_prefix(address_type: LockType = LockType.P2PKH, mainnet: bool =
         case _:
             raise ValueError("Incorrect LockType chosen")
 
+
+def encode_base58_addresses(hashes: list, address_type: LockType = LockType.P2PKH, mainnet: bool = True) -> list:
+    """
+    Returns the Base58Check addresses for the given 20-byte hashes, passing None entries through.
+    """
+    prefix = bytes.fromhex(get_address_prefix(address_type, mainnet))
+    encoded = iter(base58.encode_many([prefix + h for h in hashes if h is not None], check=True))
+    return [None if h is None else next(encoded) for h in hashes]
+
+
+def decode_base58_addresses(addresses: list) -> list:
+    """
+    Returns (prefix, hash) as hex strings for each Base58Check address, with None for each entry that is not a
+    valid address.
+    """
+    return [
+        (payload[:1].hex(), payload[1:].hex()) if payload is not None and len(payload) == BASE58_PAYLOAD_LENGTH
+        else None
+        for payload in base58.decode_many(addresses, check=True)
+    ]
+
+
+def encode_segwit_addresses(hashes: list, hrp: str = "bc", witness_version: int = 0) -> list:
+    """
+    Returns the segwit addresses for the given witness programs (e.g. 20-byte hashes), passing None entries through.
+    """
+    encoded = iter(bech32.encode_segwit_many([h for h in hashes if h is not None], hrp, witness_version))
+    return [None if h is None else next(encoded) for h in hashes]
+
+
 # def generate_bitcoin_address(public_key: str | tuple):
 #     # Generate compressed public_key
 #     pubkey =
@@ -0,0 +1,112 @@
+"""
+Base58 and Base58Check codec for bytes.
+
+A Base58 string is the big-endian base 58 representation of the data, with one leading "1" for each leading zero
+byte. Instead of one division per character, we convert in limbs of 58^10: each limb costs one big-integer division
+and is written out as five characters pairs from a table of all 58^2 pairs. Decoding reads the pairs back from the
+same table, so there is no per-character arithmetic or alphabet search.
+"""
+from src.library.hash_functions import hash256
+
+BASE58_ALPHABET = "123456789ABCDEFGHJKLMNPQRSTUVWXYZabcdefghijkmnopqrstuvwxyz"
+CHECKSUM_LENGTH = 4
+
+_PAIR_BASE = 58 * 58
+_LIMB = pow(58, 10)  # Ten characters, or five pairs, per limb
+_PAIRS = [a + b for a in BASE58_ALPHABET for b in BASE58_ALPHABET]
+_PAIR_VALUES = {pair: value for value, pair in enumerate(_PAIRS)}
+
+
+def encode(data: bytes) -> str:
+    """
+    Returns the Base58 encoding of the bytes.
+    """
+    stripped = data.lstrip(b"\x00")
+    zeros = len(data) - len(stripped)
+
+    # Split into limbs, least significant first
+    n = int.from_bytes(stripped, "big")
+    limbs = []
+    while n:
+        n, limb = divmod(n, _LIMB)
+        limbs.append(limb)
+
+    # Write out each limb as five pairs
+    pairs = _PAIRS
+    chunks = []
+    for limb in reversed(limbs):
+        limb, p5 = divmod(limb, _PAIR_BASE)
+        limb, p4 = divmod(limb, _PAIR_BASE)
+        limb, p3 = divmod(limb, _PAIR_BASE)
+        p1, p2 = divmod(limb, _PAIR_BASE)
+        chunks.append(pairs[p1] + pairs[p2] + pairs[p3] + pairs[p4] + pairs[p5])
+
+    # The leading limb is padded with zero digits; these are replaced by one "1" per leading zero byte
+    return "1" * zeros + "".join(chunks).lstrip("1")
+
+
+def decode(encoded: str) -> bytes:
+    """
+    Returns the bytes of the Base58 string. Raises a ValueError for a character outside the alphabet.
+    """
+    stripped = encoded.lstrip("1")
+    zeros = len(encoded) - len(stripped)
+
+    # Pad with zero digits to whole limbs and read five pairs per limb
+    padded = "1" * (-len(stripped) % 10) + stripped
+    values = _PAIR_VALUES
+    n = 0
+    try:
+        for i in range(0, len(padded), 10):
+            limb = values[padded[i:i + 2]]
+            limb = limb * _PAIR_BASE + values[padded[i + 2:i + 4]]
+            limb = limb * _PAIR_BASE + values[padded[i + 4:i + 6]]
+            limb = limb * _PAIR_BASE + values[padded[i + 6:i + 8]]
+            limb = limb * _PAIR_BASE + values[padded[i + 8:i + 10]]
+            n = n * _LIMB + limb
+    except KeyError:
+        raise ValueError(f"Invalid Base58 character in {encoded!r}")
+
+    return b"\x00" * zeros + n.to_bytes((n.bit_length() + 7) // 8, "big")
+
+
+def encode_check(payload: bytes) -> str:
+    """
+    Returns the Base58Check encoding of the payload: the Base58 encoding of the payload and the first four bytes of
+    its hash256.
+    """
+    return encode(payload + hash256(payload)[:CHECKSUM_LENGTH])
+
+
+def decode_check(encoded: str) -> bytes:
+    """
+    Returns the payload of the Base58Check string. Raises a ValueError if the string is not valid Base58 or the
+    checksum does not match.
+    """
+    data = decode(encoded)
+    payload, checksum = data[:-CHECKSUM_LENGTH], data[-CHECKSUM_LENGTH:]
+    if len(data) < CHECKSUM_LENGTH or hash256(payload)[:CHECKSUM_LENGTH] != checksum:
+        raise ValueError("Base58Check encoded data checksum verification failed")
+    return payload
+
+
+def encode_many(payloads: list, check: bool = False) -> list:
+    """
+    Returns the Base58 (or, with check, Base58Check) encodings of the given bytes.
+    """
+    return list(map(encode_check if check else encode, payloads))
+
+
+def decode_many(encoded_strings: list, check: bool = False) -> list:
+    """
+    Returns the bytes of the given Base58 (or, with check, Base58Check) strings, with None for each string that is
+    invalid, so that one bad entry does not fail the batch.
+    """
+    decode_one = decode_check if check else decode
+    results = []
+    for encoded in encoded_strings:
+        try:
+            results.append(decode_one(encoded))
+        except (AttributeError, TypeError, ValueError):
+            results.append(None)
+    return results
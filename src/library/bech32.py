@@ -18,9 +18,16 @@
 # OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
 # THE SOFTWARE.
 
-"""Reference implementation for Bech32/Bech32m and segwit addresses."""
+"""Reference implementation for Bech32/Bech32m and segwit addresses.
 
+The checksum uses a lookup table for the generator terms, and the segwit functions at the end work on bytes: the
+regrouping between 8-bit bytes and 5-bit symbols is done by the base32 codec of the standard library, and the
+symbols are mapped to the Bech32 charset with bytes.translate.
+"""
+
+import base64
 from enum import Enum
+from functools import lru_cache
 
 
 class Encoding(Enum):
@@ -33,15 +40,21 @@ CHARSET = "qpzry9x8gf2tvdw0s3jn54khce6mua7l"
 BECH32M_CONST = 0x2bc830a3
 
 
-def bech32_polymod(values):
-    """Internal function that computes the Bech32 checksum."""
-    generator = [0x3b6a57b2, 0x26508e6d, 0x1ea119fa, 0x3d4233dd, 0x2a1462b3]
-    chk = 1
+GENERATOR = [0x3b6a57b2, 0x26508e6d, 0x1ea119fa, 0x3d4233dd, 0x2a1462b3]
+
+# XOR of the generator terms selected by each value of the top five bits of the checksum
+POLYMOD_TABLE = [0] * 32
+for _top in range(32):
+    for _i in range(5):
+        if (_top >> _i) & 1:
+            POLYMOD_TABLE[_top] ^= GENERATOR[_i]
+
+
+def bech32_polymod(values, chk=1):
+    """Internal function that computes the Bech32 checksum, continuing from the state chk."""
+    table = POLYMOD_TABLE
     for value in values:
-        top = chk >> 25
-        chk = (chk & 0x1ffffff) << 5 ^ value
-        for i in range(5):
-            chk ^= generator[i] if ((top >> i) & 1) else 0
+        chk = ((chk & 0x1ffffff) << 5 ^ value) ^ table[chk >> 25]
     return chk
 
 
@@ -70,8 +83,6 @@ def bech32_create_checksum(hrp, data, spec):
 
 def bech32_encode(hrp, data, spec):
     """Compute a Bech32 string given HRP and data values."""
-    chk = bech32_create_checksum(hrp, data, spec)
-    # print(f"CHECKSUM: {"".join([CHARSET[c] for c in chk])}")
     combined = data + bech32_create_checksum(hrp, data, spec)
     return hrp + '1' + ''.join([CHARSET[d] for d in combined])
 
@@ -137,8 +148,110 @@ def decode(hrp, addr):
 
 def encode(hrp, witver, witprog):
     """Encode a segwit address."""
-    spec = Encoding.BECH32 if witver == 0 else Encoding.BECH32M
-    ret = bech32_encode(hrp, [witver] + convertbits(witprog, 8, 5), spec)
-    if decode(hrp, ret) == (None, None):
+    try:
+        return encode_segwit(hrp, witver, bytes(witprog))
+    except ValueError:
         return None
-    return ret
+
+
+# --- Bytes codec for segwit addresses --- #
+
+_B32_ALPHABET = b"ABCDEFGHIJKLMNOPQRSTUVWXYZ234567"
+_TO_CHARSET = bytes.maketrans(_B32_ALPHABET, CHARSET.encode())
+_TO_VALUES = bytes.maketrans(_B32_ALPHABET, bytes(range(32)))
+_FROM_CHARSET = bytes.maketrans(CHARSET.encode(), _B32_ALPHABET)
+_NOT_CHARSET = bytes(sorted(set(range(256)) - set(CHARSET.encode())))
+_B32_PADDING = {0: b"", 2: b"======", 4: b"====", 5: b"===", 7: b"="}  # By number of symbols mod 8
+
+
+@lru_cache(maxsize=16)
+def _hrp_state(hrp):
+    """Checksum state after the expanded HRP, which is shared by every address with that HRP."""
+    return bech32_polymod(bech32_hrp_expand(hrp))
+
+
+def _polymod_symbols(hrp, symbols):
+    """Checksum state after the HRP and the symbols, given as base32 alphabet bytes."""
+    return bech32_polymod(symbols.translate(_TO_VALUES), _hrp_state(hrp))
+
+
+def _validate_program(witver, witprog):
+    if not 0 <= witver <= 16:
+        raise ValueError(f"Invalid witness version {witver}")
+    if not 2 <= len(witprog) <= 40:
+        raise ValueError(f"Invalid witness program length {len(witprog)}")
+    if witver == 0 and len(witprog) not in (20, 32):
+        raise ValueError("Version 0 witness program must be 20 or 32 bytes")
+
+
+def encode_segwit(hrp: str, witver: int, witprog: bytes) -> str:
+    """
+    Encode a segwit address, using Bech32 for witness version 0 and Bech32m for versions 1 to 16. Raises a
+    ValueError for an invalid version or program. The address is valid by construction, so it is not decoded again.
+    """
+    _validate_program(witver, witprog)
+    symbols = _B32_ALPHABET[witver:witver + 1] + base64.b32encode(witprog).rstrip(b"=")
+    const = 1 if witver == 0 else BECH32M_CONST
+    polymod = bech32_polymod(bytes(6), _polymod_symbols(hrp, symbols)) ^ const
+    checksum = "".join([CHARSET[(polymod >> 5 * (5 - i)) & 31] for i in range(6)])
+    return hrp + "1" + symbols.translate(_TO_CHARSET).decode() + checksum
+
+
+def decode_segwit(hrp: str, addr: str) -> tuple:
+    """
+    Decode a segwit address into (witness version, witness program bytes). Raises a ValueError if the address is
+    not a valid segwit address for the HRP.
+    """
+    if len(addr) > 90 or (addr.lower() != addr and addr.upper() != addr):
+        raise ValueError("Invalid Bech32 string")
+    addr = addr.lower()
+    pos = addr.rfind("1")
+    if addr[:pos] != hrp or pos + 7 > len(addr):
+        raise ValueError(f"Not a segwit address for HRP {hrp!r}")
+    try:
+        data = addr[pos + 1:].encode("ascii")
+    except UnicodeEncodeError:
+        raise ValueError("Invalid Bech32 character")
+    if data.translate(None, _NOT_CHARSET) != data:
+        raise ValueError("Invalid Bech32 character")
+
+    # Checksum over the HRP, the data symbols and the checksum symbols
+    symbols = data.translate(_FROM_CHARSET)
+    values = symbols.translate(_TO_VALUES)
+    const = bech32_polymod(values, _hrp_state(hrp))
+    if const not in (1, BECH32M_CONST):
+        raise ValueError("Bech32 checksum verification failed")
+
+    # Witness version and program; the padding bits of the program must be zero
+    witver = values[0]
+    program_symbols = symbols[1:-6]
+    padding = _B32_PADDING.get(len(program_symbols) % 8)
+    if padding is None:
+        raise ValueError("Invalid witness program length")
+    witprog = base64.b32decode(program_symbols + padding)
+    spare_bits = 5 * len(program_symbols) % 8
+    if program_symbols and values[-7] & ((1 << spare_bits) - 1):
+        raise ValueError("Non-zero padding in witness program")
+    _validate_program(witver, witprog)
+    if (witver == 0) != (const == 1):
+        raise ValueError("Witness version does not match the checksum variant")
+    return witver, witprog
+
+
+def encode_segwit_many(witprogs: list, hrp: str = "bc", witver: int = 0) -> list:
+    """Encode a list of witness programs of one witness version as segwit addresses."""
+    return [encode_segwit(hrp, witver, witprog) for witprog in witprogs]
+
+
+def decode_segwit_many(addrs: list, hrp: str = "bc") -> list:
+    """
+    Decode a list of segwit addresses into (witness version, witness program bytes), with None for each address
+    that is invalid, so that one bad entry does not fail the batch.
+    """
+    results = []
+    for addr in addrs:
+        try:
+            results.append(decode_segwit(hrp, addr))
+        except (AttributeError, TypeError, ValueError):
+            results.append(None)
+    return results
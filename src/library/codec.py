@@ -2,137 +2,82 @@
 Encoding/Decoding methods
 """
 
-from src.library.bech32 import convertbits, bech32_encode, Encoding, bech32_decode
+from src.library import base58
+from src.library.bech32 import encode_segwit
 from src.library.curves import CurveType, get_curve
 from src.library.data_formats import Data
-from src.library.hash_functions import checksum, HashType
+from src.library.ecc import EllipticCurve
 
 
 # --- PUBLIC KEY COMPRESSION/EXTRACTION --- #
 
-def compress_public_key(pubkey_point: tuple):
+def compress_public_key(pubkey_point: tuple, curve_type: CurveType | EllipticCurve = CurveType.SECP256K1):
     x, y = pubkey_point
     prefix = "02" if y % 2 == 0 else "03"
-    bit_length = (x.bit_length() + 3) // 4
-    return prefix + format(x, f"0{bit_length}x")
+    hex_length = 2 * ((get_curve(curve_type).p.bit_length() + 7) // 8)  # x is padded to the byte length of p
+    return prefix + format(x, f"0{hex_length}x")
 
 
-def decompress_public_key(cpk: str, curve_type: CurveType = CurveType.SECP256K1):
+def decompress_public_key(cpk: str, curve_type: CurveType | EllipticCurve = CurveType.SECP256K1):
     # Strip leading "0x" if it exists
     if cpk.startswith("0x"):
         cpk = cpk[2:]
 
     # Break up into parity and x coordinate
-    parity = int(cpk[:2], 16)
+    prefix = int(cpk[:2], 16)
+    if prefix not in (2, 3):
+        raise ValueError(f"Compressed public key prefix {cpk[:2]} is not 02 or 03")
+    parity = prefix & 1
     x = int(cpk[2:], 16)
 
-    # Verify x is on the curve
+    # Get possible y value, verifying x is on the curve
     curve = get_curve(curve_type)
-    if not curve.is_x_on_curve(x):
+    temp_y = curve.find_y_from_x(x) if x < curve.p else None
+    if temp_y is None:
         raise ValueError(f"Decoded x value {hex(x)} not found on curve type: {curve_type}")
 
-    # Get possible y value
-    temp_y = curve.find_y_from_x(x)
-
     # Select the correct y-coordinate based on parity
-    y = temp_y if temp_y % 2 == parity else curve.p - temp_y
-
-    # Verify point is on the curve
-    if not curve.is_point_on_curve((x, y)):
-        raise ValueError(f"Point {(hex(x), hex(y))} not found on curve type: {curve_type}")
+    y = temp_y if temp_y % 2 == parity else (curve.p - temp_y) % curve.p
 
     # Return point
     return x, y
 
 
 # --- BASE 58 CODEC --- #
-base58_alphabet = "123456789ABCDEFGHJKLMNPQRSTUVWXYZabcdefghijkmnopqrstuvwxyz"
-
+# See base58.py for the bytes codec and the batch functions
 
 def encode_base58(data: Data) -> str:
-    # Get number of leading zeros
-    zero_bytes = 0
-    for i in range(len(data.bytes)):
-        chunk = data.bytes[i:i + 1]
-        if chunk == b'\x00':
-            zero_bytes += 1
-
-    # Get int value of data
-    num = data.int
-
-    # Encode
-    encoded_string = ""
-    while num > 0:
-        num, res = divmod(num, 58)  # Returns (num//58, num % 58)
-        encoded_string = base58_alphabet[res] + encoded_string
-
-    # Add leading zeros
-    encoded_string = "1" * zero_bytes + encoded_string
-    return encoded_string
+    return base58.encode(data.bytes)
 
 
 def decode_base58(encoded_string: str) -> Data:
-    # Create an integer to hold the result
-    total = 0
-
-    # Reverse string for ease of use
-    reverse_encoded_string = "".join([encoded_string[i] for i in range(len(encoded_string) - 1, -1, -1)])
-
-    for i in range(len(reverse_encoded_string)):
-        _num = base58_alphabet.index(reverse_encoded_string[i])
-        total += pow(58, i) * _num
-
-    return Data(total)
+    """
+    Returns the decoded bytes, including any leading zero bytes.
+    """
+    return Data(base58.decode(encoded_string))
 
 
 def encode_base58check(data: Data) -> str:
     """
     We add a hash256-checksum to the data before base58 encoding
     """
-    _checksum = checksum(data, hashtype=HashType.HASH256, byte_num=4)
-    return encode_base58(data + _checksum)
+    return base58.encode_check(data.bytes)
 
 
 def decode_base58check(encoded_string: str) -> Data:
-    decoded_data = decode_base58(encoded_string)
-
-    # Confirm checksum
-    _data, _checksum = decoded_data.bytes[:-4], decoded_data.bytes[-4:]
-    data = Data(_data)
-    if checksum(data) != _checksum:
-        raise ValueError("Base58Check encoded data checksum verification failed")
-
-    return decoded_data
+    """
+    Returns the payload after verifying and removing the checksum.
+    """
+    return Data(base58.decode_check(encoded_string))
 
 
 # --- BECH32 ENCODING --- #
-def encode_bech32(data: Data):
+def encode_bech32(data: Data, witness_version: int = 0, hrp: str = "bc"):
     """
-    Encoding is fixed to BECH32 as we only generate addresses for pubkeyhash. When moving to segwit V1 we need Bech32M.
+    Returns the segwit address for the witness program, using Bech32 for witness version 0 and Bech32m for later
+    versions (e.g. a 32-byte x-only public key for witness version 1). See bech32.encode_segwit.
     """
-    # Extract the bytes from the Data instance
-    pubkey_hash = data.bytes
-
-    # Ensure pubkey_hash is exactly 20 bytes
-    if len(pubkey_hash) != 20:
-        raise ValueError("P2WPKH pubkey hash must be exactly 20 bytes.")
-
-    # Convert 8-bit data to 5-bit using the reference convertbits function
-    converted_data = convertbits(pubkey_hash, 8, 5, pad=False)
-    if converted_data is None:
-        raise ValueError("Failed to convert data from 8-bit to 5-bit.")
-
-    # Prepend version byte (0x00 for SegWit v0)
-    converted_data = [0] + converted_data
-
-    # Submit converted_data using "bc" as hrp
-    bech32_address = bech32_encode(hrp="bc", data=converted_data, spec=Encoding.BECH32)
-
-    # Decode to verify checksum
-    hrp, decoded_data, spec = bech32_decode(bech32_address)
-    if hrp != 'bc' or decoded_data is None:
-        raise ValueError("Checksum verification failed.")
-    return bech32_address
+    return encode_segwit(hrp, witness_version, data.bytes)
 
 
 # --- DER CODEC --- #
@@ -3,9 +3,10 @@ NIST Elliptic Curves - See https://www.secg.org/sec2-v2.pdf for constants.
 All groups of rational points have prime order, hence all curves are suitable for use in ECDSA.
 """
 
+import threading
 from enum import Enum
 
-from src.library.ecc import EllipticCurve
+from src.library.ecc import EllipticCurve, Endomorphism
 
 
 class CurveType(Enum):
@@ -19,7 +20,31 @@ class CurveType(Enum):
     SECP521R1 = "secp521r1"
 
 
-def get_curve(curve_type: CurveType):
+# --- CURVE REGISTRY --- #
+# Curves are immutable, so each is built once and shared by every caller, along with its lazily built tables
+_CURVE_REGISTRY = {}
+_REGISTRY_LOCK = threading.Lock()
+
+
+def get_curve(curve_type: CurveType | EllipticCurve) -> EllipticCurve:
+    """
+    Returns the shared EllipticCurve context for the given curve type. An EllipticCurve is returned as is, so that
+    library functions can accept either a CurveType or a curve context.
+    """
+    if isinstance(curve_type, EllipticCurve):
+        return curve_type
+
+    curve = _CURVE_REGISTRY.get(curve_type)
+    if curve is None:
+        with _REGISTRY_LOCK:
+            curve = _CURVE_REGISTRY.get(curve_type)
+            if curve is None:
+                curve = _build_curve(curve_type)
+                _CURVE_REGISTRY[curve_type] = curve
+    return curve
+
+
+def _build_curve(curve_type: CurveType) -> EllipticCurve:
     func_map = {
         CurveType.SECP256K1: secp256k1,
         CurveType.SECP192K1: secp192k1,
@@ -43,9 +68,10 @@ def secp192k1():
     p = pow(2, 192) - pow(2, 32) - pow(2, 12) - pow(2, 8) - pow(2, 7) - pow(2, 6) - pow(2, 3) - 1
     order = 0xfffffffffffffffffffffffe26f2fc170f69466a74defd8d
     generator = (0xdb4ff10ec057e9ae26b07d0280b7f4341da5d1b1eae06c7d, 0x9b2f2f6d9c5628a7844163d015be86344082aa88d95e2f9d)
+    generator_window = 8  # Fixed-base table width
 
     # Return curve object
-    return EllipticCurve(a, b, p, order, generator)
+    return EllipticCurve(a, b, p, order, generator, generator_window)
 
 
 def secp192r1():
@@ -55,9 +81,10 @@ def secp192r1():
     p = pow(2, 192) - pow(2, 64) - 1
     order = 0xffffffffffffffffffffffff99def836146bc9b1b4d22831
     generator = (0x188da80eb03090f67cbf20eb43a18800f4ff0afd82ff1012, 0x07192b95ffc8da78631011ed6b24cdd573f977a11e794811)
+    generator_window = 8  # Fixed-base table width
 
     # Return curve object
-    return EllipticCurve(a, b, p, order, generator)
+    return EllipticCurve(a, b, p, order, generator, generator_window)
 
 
 def secp224k1():
@@ -69,9 +96,10 @@ def secp224k1():
     generator = (
         0xa1455b334df099df30fc28a169a467e9e47075a90f7e650eb6b7a45c,
         0x7e089fed7fba344282cafbd6f7e319f7c0b0bd59e2ca4bdb556d61a5)
+    generator_window = 8  # Fixed-base table width
 
     # Return curve object
-    return EllipticCurve(a, b, p, order, generator)
+    return EllipticCurve(a, b, p, order, generator, generator_window)
 
 
 def secp224r1():
@@ -83,9 +111,10 @@ def secp224r1():
     generator = (
         0xb70e0cbd6bb4bf7f321390b94a03c1d356c21122343280d6115c1d21,
         0xbd376388b5f723fb4c22dfe6cd4375a05a07476444d5819985007e34)
+    generator_window = 8  # Fixed-base table width
 
     # Return curve object
-    return EllipticCurve(a, b, p, order, generator)
+    return EllipticCurve(a, b, p, order, generator, generator_window)
 
 
 def secp256k1():
@@ -96,9 +125,20 @@ def secp256k1():
     order = 0xfffffffffffffffffffffffffffffffebaaedce6af48a03bbfd25e8cd0364141
     generator = (0x79be667ef9dcbbac55a06295ce870b07029bfcdb2dce28d959f2815b16f81798,
                  0x483ada7726a3c4655da4fbfc0e1108a8fd17b448a68554199c47d08ffb10d4b8)
+    generator_window = 8  # Fixed-base table width
+
+    # Endomorphism (beta * x, y) = lambda * (x, y), with beta and lambda primitive cube roots of unity mod p and n
+    endomorphism = Endomorphism(
+        beta=0x7ae96a2b657c07106e64479eac3434e99cf0497512f58995c1396c28719501ee,
+        lam=0x5363ad4cc05c30e0a5261c028812645a122e22ea20816678df02967c1b23bd72,
+        basis=(
+            (0x3086d221a7d46bcde86c90e49284eb15, -0xe4437ed6010e88286f547fa90abfe4c3),
+            (0x114ca50f7a8e2f3f657c1108d9d44cfd8, 0x3086d221a7d46bcde86c90e49284eb15)
+        )
+    )
 
     # Return curve object
-    return EllipticCurve(a, b, p, order, generator)
+    return EllipticCurve(a, b, p, order, generator, generator_window, endomorphism)
 
 
 def secp256r1():
@@ -110,9 +150,10 @@ def secp256r1():
     generator = (
         0x6b17d1f2e12c4247f8bce6e563a440f277037d812deb33a0f4a13945d898c296,
         0x4fe342e2fe1a7f9b8ee7eb4a7c0f9e162bce33576b315ececbb6406837bf51f5)
+    generator_window = 8  # Fixed-base table width
 
     # Return curve object
-    return EllipticCurve(a, b, p, order, generator)
+    return EllipticCurve(a, b, p, order, generator, generator_window)
 
 
 def secp384r1():
@@ -124,9 +165,10 @@ def secp384r1():
     generator = (
         0xaa87ca22be8b05378eb1c71ef320ad746e1d3b628ba79b9859f741e082542a385502f25dbf55296c3a545e3872760ab7,
         0x3617de4a96262c6f5d9e98bf9292dc29f8f41dbd289a147ce9da3113b5f0b8c00a60b1ce1d7e819d7a431d7c90ea0e5f)
+    generator_window = 7  # Fixed-base table width
 
     # Return curve object
-    return EllipticCurve(a, b, p, order, generator)
+    return EllipticCurve(a, b, p, order, generator, generator_window)
 
 
 def secp521r1():
@@ -138,6 +180,7 @@ def secp521r1():
     generator = (
         0x00c6858e06b70404e9cd9e3ecb662395b4429c648139053fb521f828af606b4d3dbaa14b5e77efe75928fe1dc127a2ffa8de3348b3c1856a429bf97e7e31c2e5bd66,
         0x011839296a789a3bc0045c8a5fb42c7d1bd998f54449579b446817afbd17273e662c97ee72995ef42640c550b9013fad0761353c7086a272c24088be94769fd16650)
+    generator_window = 6  # Fixed-base table width
 
     # Return curve object
-    return EllipticCurve(a, b, p, order, generator)
+    return EllipticCurve(a, b, p, order, generator, generator_window)
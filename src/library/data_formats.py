@@ -1,69 +1,138 @@
 """
 Class to handle data. The default value will be byte-encoded data.
 """
-import re
 from typing import Literal
 
+_HEX_DIGITS = b"0123456789abcdefABCDEF"
+
 
 class Data:
-    def __init__(self, data: str | bytes | int, byte_order: Literal["big", "little"] = "big"):
+    """
+    An immutable sequence of bytes with cached hex and integer representations.
+
+    Data built from a bytearray or memoryview keeps a read-only view of the caller's buffer instead of copying it,
+    as does slicing; the buffer must not be modified while the Data is in use. The hex and int representations are
+    computed on first access and then reused.
+    """
+    __slots__ = ("_data", "_byte_order", "_hex", "_int")
+
+    def __init__(self, data: str | bytes | bytearray | memoryview | int,
+                 byte_order: Literal["big", "little"] = "big"):
         """
-        Initialize the Data object, handling integers, ASCII, hexadecimal strings, and bytes.
+        Initialize the Data object, handling integers, ASCII, hexadecimal strings, and bytes-like objects.
         """
         # Byte order for changing between int and bytes
-        self.byte_order = byte_order
+        self._byte_order = byte_order
 
+        # _data holds either bytes or a read-only memoryview; the _hex and _int slots stay unset until first use
         if isinstance(data, bytes):
             self._data = data
+        elif isinstance(data, (bytearray, memoryview)):
+            self._data = memoryview(data).cast("B").toreadonly()
         elif isinstance(data, int):
             bit_length = (data.bit_length() + 7) // 8
-            self._data = data.to_bytes(bit_length, self.byte_order)
+            self._data = data.to_bytes(bit_length, self._byte_order)
+            self._int = data
         elif isinstance(data, str):
             if data.startswith("0x"):
                 data = data[2:]
             if self.is_hex(data):
                 self._data = bytes.fromhex(data)
+                self._hex = data.lower()
             else:
                 self._data = data.encode()
         else:
-            raise TypeError("Input must be a bytes object, integer, hexadecimal string, or ASCII string.")
+            raise TypeError("Input must be a bytes-like object, integer, hexadecimal string, or ASCII string.")
 
     def __add__(self, other):
         """
         We overload add/radd so that if blob is a hex string, or bytes/int object, we can add blob + self or self+blob.
+        Bytes, Data and hex strings are concatenated; an integer is added to the integer value.
         """
         if isinstance(other, bytes):
             return Data(self.bytes + other)
+        elif isinstance(other, (bytearray, memoryview, Data)):
+            return Data(self.bytes + bytes(other))
         elif isinstance(other, int):
             return Data(self.int + other)
         elif isinstance(other, str) and Data.is_hex(other):
-            return Data(self.hex + other)
+            return Data(self.bytes + bytes.fromhex(other.removeprefix("0x")))
+        else:
+            return NotImplemented
+
+    def __radd__(self, other):
+        if isinstance(other, (bytes, bytearray, memoryview)):
+            return Data(bytes(other) + self.bytes)
+        elif isinstance(other, int):
+            return Data(other + self.int)
+        elif isinstance(other, str) and Data.is_hex(other):
+            return Data(bytes.fromhex(other.removeprefix("0x")) + self.bytes)
         else:
             return NotImplemented
 
     def __len__(self):
         """Returns byte length"""
-        return len(self.bytes)
+        return len(self._data)
 
-    def __radd__(self, other):
-        return self.__add__(other)
+    def __getitem__(self, index):
+        """
+        Returns the byte at an index, or a Data view of a slice, which shares the underlying bytes.
+        """
+        if isinstance(index, slice):
+            return Data(self.view[index], self._byte_order)
+        return self._data[index]
+
+    def __bytes__(self):
+        return self.bytes
+
+    def __eq__(self, other):
+        if isinstance(other, Data):
+            return self._data == other._data
+        return NotImplemented
+
+    def __hash__(self):
+        return hash(self.bytes)
+
+    def __repr__(self):
+        return f"Data({self.hex!r})"
+
+    @property
+    def byte_order(self) -> str:
+        return self._byte_order
 
     @property
     def bytes(self) -> bytes:
+        """The bytes; a view is copied into bytes once, on first access."""
+        if type(self._data) is not bytes:
+            self._data = bytes(self._data)
         return self._data
 
+    @property
+    def view(self) -> memoryview:
+        """A read-only memoryview of the bytes, without copying."""
+        return memoryview(self._data).toreadonly()
+
     @property
     def hex(self) -> str:
-        return self._data.hex()
+        try:
+            return self._hex
+        except AttributeError:
+            self._hex = self._data.hex()
+            return self._hex
 
     @property
     def int(self):
-        return int.from_bytes(self._data, self.byte_order)
+        try:
+            return self._int
+        except AttributeError:
+            self._int = int.from_bytes(self._data, self._byte_order)
+            return self._int
 
     @staticmethod
     def is_hex(text: str) -> bool:
         """
         Return True if the string is in hexadecimal format, otherwise return False.
         """
-        hex_pattern = r'^(0x)?[0-9a-fA-F]+$'
-        return bool(re.match(hex_pattern, text))
+        if text.startswith("0x"):
+            text = text[2:]
+        return bool(text) and text.isascii() and not text.encode().translate(None, _HEX_DIGITS)
@@ -4,15 +4,74 @@ Elliptic Curve Class
 # --- IMPORTS --- #
 import json
 import secrets
+from functools import partial
 
-from src.library.ecc_math import legendre_symbol, tonelli_shanks
+from src.library import jacobian
+from src.library.ecc_math import MAX_PRIME, jacobi_symbol, square_root_context, wnaf
+from src.library.field import field_for_prime
+from src.library.point_counting import POINT_COUNTING_MAX_BITS, count_points
 
-MAX_PRIME = pow(2, 19) - 1  # 7th Mersenne Prime
+GENERATOR_WNAF_WIDTH = 8  # wNAF width for the generator in joint multiplications
+
+
+class Endomorphism:
+
+    def __init__(self, beta: int, lam: int, basis: tuple):
+        """
+        We describe an efficiently computable endomorphism phi(x, y) = (beta * x, y) of E(F_p), acting on the group
+        as multiplication by lam, i.e. phi(P) = lam * P for every point P.
+
+        The basis ((a1, b1), (a2, b2)) consists of two short vectors of the lattice {(x, y) : x + y * lam = 0 (mod n)},
+        and is used to split a scalar k into two half-length scalars k1, k2 with k = k1 + k2 * lam (mod n). This is
+        the GLV method; see Gallant, Lambert and Vanstone, "Faster Point Multiplication on Elliptic Curves with
+        Efficient Endomorphisms".
+        """
+        self.beta = beta
+        self.lam = lam
+        self.basis = basis
+
+    def decompose(self, k: int, n: int) -> tuple:
+        """
+        Returns (k1, k2) with k = k1 + k2 * lam (mod n), where k1 and k2 are of size about sqrt(n).
+
+        Algorithm:
+        ---------
+        Let (a1, b1), (a2, b2) be the basis vectors. Compute the rounded coordinates of (k, 0) in this basis,
+            c1 = round(b2 * k / n), c2 = round(-b1 * k / n),
+        and return the difference between (k, 0) and the nearby lattice vector c1 * (a1, b1) + c2 * (a2, b2).
+        """
+        (a1, b1), (a2, b2) = self.basis
+        c1 = (2 * b2 * k + n) // (2 * n)
+        c2 = (-2 * b1 * k + n) // (2 * n)
+        k1 = k - c1 * a1 - c2 * a2
+        k2 = -c1 * b1 - c2 * b2
+        return k1, k2
+
+
+class PointTable:
+
+    def __init__(self, point: tuple, wnaf_width: int, wnaf_tables: tuple, window: int = 0,
+                 window_table: list | None = None):
+        """
+        Precomputed multiples of a fixed affine point P, for repeated multiplications of P. See
+        EllipticCurve.precompute_point.
+
+        wnaf_tables : the odd multiples of P (and of phi(P) if the curve has an endomorphism) for width wnaf_width,
+            used when P is multiplied together with other points.
+        window_table : optionally, the fixed-base table of P for the given window, with which P is multiplied without
+            doublings.
+        """
+        self.point = point
+        self.wnaf_width = wnaf_width
+        self.wnaf_tables = wnaf_tables
+        self.window = window
+        self.window_table = window_table
 
 
 class EllipticCurve:
 
-    def __init__(self, a: int, b: int, p: int, order: int, generator: tuple):
+    def __init__(self, a: int, b: int, p: int, order: int | None = None, generator: tuple | None = None,
+                 generator_window: int = 4, endomorphism: Endomorphism | None = None):
         """
         We instantiate an elliptic curve E of the form
 
@@ -22,6 +81,21 @@ class EllipticCurve:
         point at infinity. The order variable refers to the order of this group. As the group is cyclic,
         it will contain a generator point, which can be specified during instantiation.
 
+        If the order is not given, it is computed by point counting (see point_counting.count_points), which takes
+        tens of seconds for a 128-bit prime; for a prime of more than POINT_COUNTING_MAX_BITS bits the order must be
+        given, and a ValueError is raised otherwise. Without a generator, the methods using the generator are
+        unavailable.
+
+        The generator_window is the width w (in bits) of the fixed-base table used by multiply_generator. The table
+        holds about (bits/w) * 2^(w-1) points and a multiplication costs about bits/w additions, so larger windows
+        trade memory and one-time setup for speed. A window of 0 disables the table.
+
+        If the curve has an efficiently computable endomorphism, it can be supplied to speed up variable-base and
+        double-scalar multiplication.
+
+        Curve objects are immutable once instantiated, so a single instance can be shared as a context by every
+        caller (see curves.get_curve). Constants derived from the curve values are computed here, while heavy
+        precomputation such as the generator tables is done lazily on first use and then reused.
         """
         # Get curve values
         self.a = a
@@ -29,17 +103,54 @@ class EllipticCurve:
         self.p = p
 
         # Get group values
+        if order is None:
+            if p.bit_length() > POINT_COUNTING_MAX_BITS:
+                raise ValueError(f"The order of a curve over a prime of more than {POINT_COUNTING_MAX_BITS} bits must "
+                                 f"be given")
+            order = count_points(a, b, p)
         self.order = order
         self.generator = generator
+        self.generator_window = generator_window if generator is not None else 0
+        self.endomorphism = endomorphism
+
+        # Derived constants
+        self.order_bits = order.bit_length()
+        self.order_mask = (1 << self.order_bits) - 1
+        self.square_root = square_root_context(p)
+        self.field = field_for_prime(p)
+
+        # Bind the point formulas (see jacobian.py) to the curve, with the doubling formula specialised to a
+        self._jacobian_double = partial(jacobian.doubling_formula(a, p), a, p)
+        self._jacobian_add = partial(jacobian.add, a, p)
+        self._jacobian_add_affine = partial(jacobian.add_affine, a, p)
+
+        # Use the specialised field reduction in the point formulas where it beats the built-in modulo
+        if self.field.replaces_modulo:
+            if jacobian.doubling_formula(a, p) is jacobian.double_a3:
+                self._jacobian_double = self._double_a3_field
+            self._jacobian_add = self._jacobian_add_field
+            self._jacobian_add_affine = self._jacobian_add_affine_field
+
+        # Lazy precomputation
+        self._generator_table = None
+        self._generator_wnaf_table = None
+        self._generator_phi_table = None
+
+        # Freeze public attributes
+        self._frozen = True
+
+    def __setattr__(self, name, value):
+        if getattr(self, "_frozen", False) and not name.startswith("_"):
+            raise AttributeError(f"EllipticCurve is immutable; cannot set attribute '{name}'")
+        super().__setattr__(name, value)
 
     def __repr__(self):
-        gx, gy = self.generator
         hex_dict = {
             'a': hex(self.a),
             'b': hex(self.b),
             'p': hex(self.p),
             'order': hex(self.order),
-            'generator': (hex(gx), hex(gy))
+            'generator': None if self.generator is None else tuple(hex(c) for c in self.generator)
         }
         return json.dumps(hex_dict)
 
@@ -55,13 +166,12 @@ class EllipticCurve:
         """
         Returns a cryptographically secure random point on the curve.
         """
-        # Find a random x-coordinate that is on the curve
-        x = next(
-            x for x in (secrets.randbelow(self.p - 1) for _ in iter(int, 1))
-            if self.is_x_on_curve(x)
-        )
-        # Compute corresponding y-coordinate
-        return x, self.find_y_from_x(x)
+        # Find a random x-coordinate that is on the curve, with its y-coordinate
+        while True:
+            x = secrets.randbelow(self.p - 1)
+            y = self.find_y_from_x(x)
+            if y is not None:
+                return x, y
 
     def is_point_on_curve(self, point: tuple) -> bool:
         """
@@ -78,36 +188,21 @@ class EllipticCurve:
     def is_x_on_curve(self, x: int) -> bool:
         """
         A residue x is on the curve E iff x^3 + ax + b is a quadratic residue modulo p.
-        This includes the trivial case x^3 + ax + b = 0 (mod p). Hence, by Euler's criterion, if
-            ((x^3+ax+b) | p) != 1 (mod p),
+        This includes the trivial case x^3 + ax + b = 0 (mod p). Hence, if the Jacobi symbol
+            ((x^3+ax+b) | p) != -1,
         then x is a point on the curve.
         """
-        return legendre_symbol(self.x_terms(x), self.p) != -1
+        return jacobi_symbol(self.x_terms(x), self.p) != -1
 
     def find_y_from_x(self, x: int):
         """
-        Using Tonelli-Shanks, return the smaller y such that E(x, y) = 0 if x is on the curve.
+        Return a y such that E(x, y) = 0 if x is on the curve, and None otherwise.
         Note that if (x, y) is a point, then (x, p-y) is also a point.
-        """
 
-        # Verify x is on curve
-        if not self.is_x_on_curve(x):
-            return None
-
-        # Find the two possible y values
-        y = tonelli_shanks(self.x_terms(x), self.p)
-        neg_y = -y % self.p
-
-        # Check y values
-        try:
-            assert self.is_point_on_curve((x, y))
-            assert self.is_point_on_curve((x, neg_y))
-            assert self.add_points((x, y), (x, neg_y)) is None
-        except AssertionError:
-            return None
-
-        # Return y
-        return y
+        The square root is taken with the square root engine for p (see ecc_math.SquareRoot), which verifies its
+        result, so no separate residuosity test is needed.
+        """
+        return self.square_root(self.x_terms(x))
 
     # --- Group operations --- #
 
@@ -158,31 +253,49 @@ class EllipticCurve:
         # Return sum of points
         return point
 
+    def negate_point(self, point: tuple):
+        """
+        Returns the inverse -P = (x, -y) of the point P = (x, y).
+        """
+        return jacobian.negate_point(self.p, point)
+
     def scalar_multiplication(self, n: int, point: tuple):
         """
-        We use the double-and-add algorithm to add a point P with itself n times.
+        We use the width-w NAF algorithm to add a point P with itself n times.
 
         Algorithm:
         ---------
-        Break n into a binary representation (big-endian).
-        Then iterate over each bit in the representation as follows:
-            1) If it's the first bit, ignore;
-            2) double the previous result (starting with P)
-            3) if the bit = 1, add a copy of P to the result.
-
-        Ex: n = 26. Binary representation = 11010
-            bit     | action        | result
+        Choose a window width w from the bit length of n (see select_window) and write n in width-w NAF:
+            n = sum d_i * 2^i, where each non-zero d_i is odd with |d_i| < 2^(w-1).
+        Precompute the odd multiples P, 3P, ..., (2^(w-1) - 1)P. Then iterate over the digits, most significant first:
+            1) double the result;
+            2) if d_i != 0, add d_i * P to the result (negating the table point if d_i < 0).
+
+        Ex: n = 26, w = 3. NAF (big-endian) = 1 0 0 0 -3 0
+            digit   | action        | result
             --------------------------------
-            1       | ignore        | P
-            1       | double/add    | 2P + P = 3P
-            0       | double        | 6P
-            1       | double/add    | 12P + P = 13P
+            1       | double/add    | P
+            0       | double        | 2P
+            0       | double        | 4P
+            0       | double        | 8P
+            -3      | double/add    | 16P - 3P = 13P
             0       | double        | 26P
+
+        Non-zero digits are at least w positions apart, so a b-bit scalar needs about b/(w+1) additions instead of
+        the b/2 of double-and-add. All intermediate points are kept in Jacobian coordinates, so the only modular
+        inversion is the conversion of the final result back to affine coordinates.
+
+        If the curve has an endomorphism, n * P is computed as k1 * P + k2 * phi(P) with half-length k1, k2, which
+        halves the number of doublings.
         """
         # Point at infinity case
         if point is None:
             return None
 
+        # Verify point
+        if not self.is_point_on_curve(point):
+            return None
+
         # Take residue of n modulo the group order
         n = n % self.order
 
@@ -190,20 +303,227 @@ class EllipticCurve:
         if n == 0:
             return None
 
-        # Initialize result to point at infinity and temp_point to the given point
-        result = None
-        temp_point = point
-        # Iterate over the bits of n, from least significant to most significant
+        # Proceed with algorithm
+        temp_point = self._interleaved_wnaf(self._wnaf_terms(n, point))
+
+        # Return to affine coordinates
+        result = self.to_affine(temp_point)
+
+        # Verify results
+        if not self.is_point_on_curve(result):
+            return None
+
+        return result
+
+    @staticmethod
+    def select_window(bits: int) -> int:
+        """
+        Returns the wNAF width w minimising the cost of a b-bit variable-base multiplication, estimated in point
+        additions as 2^(w-2) for the odd multiples plus b/(w+1) for the digits.
+        """
+        return min(range(2, 9), key=lambda w: (1 << (w - 2)) + bits / (w + 1))
+
+    def multiply_generator(self, n: int):
+        """
+        We multiply the generator using a precomputed fixed-base table, so that no doublings are needed.
+
+        Algorithm:
+        ---------
+        Let w be the window width. Recode n in signed base 2^w:
+            n = sum d_i * 2^(w*i), with -2^(w-1) < d_i <= 2^(w-1).
+        The table holds the points j * 2^(w*i) * G for 1 <= j <= 2^(w-1), hence
+            n * G = sum sign(d_i) * T[i][|d_i|],
+        which costs one (mixed) addition per non-zero digit. Negative digits use the negated table point.
+        """
+        if not self.generator_window:
+            return self.scalar_multiplication(n, self.generator)
+
+        # Take residue of n modulo the group order
+        n = n % self.order
+
+        # Handle zero residue case
+        if n == 0:
+            return None
+
+        # Return to affine coordinates
+        result = self.to_affine(self._generator_jacobian(n))
+
+        # Verify results
+        if not self.is_point_on_curve(result):
+            return None
+
+        return result
+
+    def multiply_generator_batch(self, scalars: list) -> list:
+        """
+        Returns the list of points n * G for the given scalars. Each product is computed in Jacobian coordinates
+        with the fixed-base table, and all results are normalised together with a single inversion.
+        """
+        if not self.generator_window:
+            return [self.scalar_multiplication(n, self.generator) for n in scalars]
+
+        return self.normalize_points([self._generator_jacobian(n % self.order) for n in scalars])
+
+    def generator_multiples(self, start: int, count: int) -> list:
+        """
+        Returns the consecutive multiples start * G, (start + 1) * G, ..., (start + count - 1) * G. Only the first
+        point is a full multiplication; every later point is one mixed addition of G to the previous one, and all
+        points are normalised together with a single inversion.
+        """
+        if count <= 0:
+            return []
+
+        temp_point = self.to_jacobian(self.multiply_generator(start))
+        points = [temp_point]
+        for _ in range(count - 1):
+            temp_point = self._jacobian_add_affine(temp_point, self.generator)
+            points.append(temp_point)
+        return self.normalize_points(points)
+
+    def _generator_jacobian(self, n: int):
+        """
+        Returns n * G in Jacobian coordinates using the fixed-base table, for 0 <= n < order.
+        """
+        return self._fixed_base_jacobian(n, self.generator_table(), self.generator_window)
+
+    def _fixed_base_jacobian(self, n: int, table: list, w: int):
+        """
+        Returns n * P in Jacobian coordinates for 0 <= n < order, given the fixed-base table of P for the window w.
+        See multiply_generator.
+        """
+        row_size = 1 << (w - 1)
+        temp_point = None
+        for i, digit in enumerate(self._signed_digits(n, w)):
+            if digit > 0:
+                temp_point = self._jacobian_add_affine(temp_point, table[i * row_size + digit - 1])
+            elif digit < 0:
+                temp_point = self._jacobian_add_affine(temp_point, self.negate_point(table[i * row_size - digit - 1]))
+        return temp_point
+
+    def generator_table(self) -> list:
+        """
+        Returns the fixed-base table for the generator. The table is built on first use.
+        """
+        if self._generator_table is None:
+            self._generator_table = self.fixed_base_table(self.generator, self.generator_window)
+        return self._generator_table
+
+    def use_generator_tables(self, table=None, wnaf_table=None):
+        """
+        Uses precomputed generator tables instead of building them, e.g. tables memory-mapped from a file (see
+        table_store). Each table is any indexable sequence of affine points laid out as generator_table and
+        generator_wnaf_table; the image of a new wNAF table under the endomorphism is built from it on first use.
+        Raises a ValueError if a table has the wrong length.
+        """
+        if table is not None:
+            if not self.generator_window:
+                raise ValueError("Curve has no generator table")
+            rows = -(-(self.order_bits + 1) // self.generator_window)
+            if len(table) != rows << (self.generator_window - 1):
+                raise ValueError("Generator table does not match the generator window")
+            self._generator_table = table
+        if wnaf_table is not None:
+            if len(wnaf_table) != 1 << (GENERATOR_WNAF_WIDTH - 2):
+                raise ValueError("Generator wNAF table does not match GENERATOR_WNAF_WIDTH")
+            self._generator_wnaf_table = wnaf_table
+            self._generator_phi_table = None
+
+    def fixed_base_table(self, point: tuple, w: int) -> list:
+        """
+        Returns the fixed-base table of the affine point P for the window w as a flat list, where the entry at index
+        i * 2^(w-1) + j - 1 is the affine point j * 2^(w*i) * P.
+        """
+        row_size = 1 << (w - 1)
+        rows = -(-(self.order_bits + 1) // w)  # Allow for the final carry of the signed recoding
+
+        table = []
+        base = self.to_jacobian(point)
+        for _ in range(rows):
+            # Row i holds j * B for B = 2^(w*i) * P and 1 <= j <= 2^(w-1)
+            multiple = base
+            table.append(multiple)
+            for _ in range(row_size - 1):
+                multiple = self._jacobian_add(multiple, base)
+                table.append(multiple)
+
+            # Next base is 2^w * B = 2 * (2^(w-1) * B)
+            base = self._jacobian_double(multiple)
+        return self.normalize_points(table)
+
+    @staticmethod
+    def _signed_digits(n: int, w: int) -> list:
+        """
+        Returns the signed base 2^w digits of n, least significant first, with each digit in (-2^(w-1), 2^(w-1)].
+        """
+        radix = 1 << w
+        half = radix >> 1
+        digits = []
         while n > 0:
-            # If the least significant bit is 1, add temp_point to result
-            if n & 1:
-                result = self.add_points(result, temp_point)
+            digit = n & (radix - 1)
+            if digit > half:
+                digit -= radix
+            digits.append(digit)
+            n = (n - digit) >> w
+        return digits
+
+    # --- Simultaneous multiplication --- #
+
+    def double_scalar_multiplication(self, n1: int, point1: tuple, n2: int, point2: tuple,
+                                     table2: PointTable | None = None):
+        """
+        Returns n1 * P1 + n2 * P2 using Strauss-Shamir interleaving, so both products share a single chain of
+        doublings. A PointTable for P2 can be given if P2 is multiplied repeatedly. See strauss_multiplication.
+        """
+        return self.strauss_multiplication([n1, n2], [point1, point2], [None, table2])
 
-            # Double temp_point
-            temp_point = self.add_points(temp_point, temp_point)
+    def strauss_multiplication(self, scalars: list, points: list, tables: list | None = None):
+        """
+        Returns the sum of n_i * P_i using Strauss-Shamir interleaving, so all products share a single chain of
+        doublings.
 
-            # Right-shift n to process the next bit
-            n >>= 1
+        Algorithm:
+        ---------
+        Write each n_i in width-w NAF and precompute the odd multiples P, 3P, ..., (2^(w-1) - 1)P of each point.
+        Then iterate over the digit positions from most significant to least significant:
+            1) double the result;
+            2) for each scalar with a non-zero digit d at this position, add d * P_i (negating the table point if
+               d < 0).
+        For the generator, the odd multiples and their images under the endomorphism come from cached tables of
+        width GENERATOR_WNAF_WIDTH; otherwise the width is chosen per scalar by select_window. If the curve has an
+        endomorphism, each product is further split into two half-length products, so twice as many terms share half
+        as many doublings.
+
+        The optional tables hold a PointTable (or None) for each point. A point with a fixed-base table is multiplied
+        without doublings; if every point has one (the generator always does), no chain of doublings is needed.
+        """
+        # Verify points
+        if not all(self.is_point_on_curve(point) for point in points):
+            return None
+        tables = tables or [None] * len(points)
+
+        # Use fixed-base multiplication if it removes the doublings altogether
+        all_fixed = all(
+            (table is not None and table.window_table is not None)
+            or (point == self.generator and self.generator_window)
+            for point, table in zip(points, tables)
+        )
+
+        # Build the terms for each non-trivial product
+        terms = []
+        fixed = None
+        for n, point, table in zip(scalars, points, tables):
+            n = n % self.order
+            if n == 0 or point is None:
+                continue
+            if table is not None and table.window_table is not None:
+                fixed = self._jacobian_add(fixed, self._fixed_base_jacobian(n, table.window_table, table.window))
+            elif all_fixed:
+                fixed = self._jacobian_add(fixed, self._generator_jacobian(n))
+            else:
+                terms.extend(self._wnaf_terms(n, point, table))
+
+        # Return to affine coordinates
+        result = self.to_affine(self._jacobian_add(self._interleaved_wnaf(terms), fixed))
 
         # Verify results
         if not self.is_point_on_curve(result):
@@ -211,26 +531,331 @@ class EllipticCurve:
 
         return result
 
-        # # Proceed with algorithm
-        # bitstring = bin(n)[2:]
-        # temp_point = point
-        # for x in range(1, len(bitstring)):
-        #     temp_point = self.add_points(temp_point, temp_point)  # Double regardless of bit
-        #     bit = int(bitstring[x:x + 1], 2)
-        #     if bit == 1:
-        #         temp_point = self.add_points(temp_point, point)  # Add to the doubling if bit == 1
-        #
-        # # Verify results
-        # try:
-        #     assert self.is_point_on_curve(temp_point)
-        # except AssertionError:
-        #     return None
-        #
-        # # Return point
-        # return temp_point
+    def multi_scalar_multiply(self, scalars: list, points: list):
+        """
+        Returns the sum of n_i * P_i, choosing between Strauss interleaving and Pippenger's bucket method.
+
+        Both methods share about b doublings for b-bit scalars. Their remaining costs for m terms, in units of mixed
+        additions, are estimated as
+            Strauss:   1.4 * m * (1.5 * 2^(w-2) + 5 + b/(w+1))      (per-point tables of odd multiples)
+            Pippenger: (b/c) * (m + 1.5 * 2^c)                     (2^(c-1) buckets per c-bit window)
+        where a full Jacobian addition counts as 1.5, the table inversion as 5, and the factor 1.4 covers the cost
+        of the wNAF recoding. With an endomorphism, b is halved and the m scalars become 2m (sharing m tables).
+        Strauss wins for a few terms, but its per-point cost does not fall as m grows, so Pippenger wins for large
+        inputs. We evaluate both estimates and use the cheaper method.
+        """
+        # With an endomorphism, both methods work with twice as many half-length scalars
+        bits, terms, split = self.order_bits, len(points), 1
+        if self.endomorphism is not None:
+            bits, split = (bits + 1) // 2, 2
+        w = self.select_window(bits)
+        strauss_cost = 1.4 * terms * (1.5 * (1 << (w - 2)) + 5 + split * bits / (w + 1))
+        c = self.select_bucket_window(bits, split * terms)
+        pippenger_cost = -(-bits // c) * (split * terms + 1.5 * (1 << c))
+
+        if strauss_cost <= pippenger_cost:
+            return self.strauss_multiplication(scalars, points)
+        return self.pippenger_multiplication(scalars, points)
+
+    def pippenger_multiplication(self, scalars: list, points: list):
+        """
+        Returns the sum of n_i * P_i using Pippenger's bucket method.
 
-    def multiply_generator(self, n: int):
-        return self.scalar_multiplication(n, self.generator)
+        Algorithm:
+        ---------
+        Choose a window width c (see select_bucket_window) and write each n_i in signed base 2^c, with digits
+        d_ij in (-2^(c-1), 2^(c-1)]. For each window j, from most significant to least significant:
+            1) double the result c times;
+            2) add each point P_i (negated if d_ij < 0) into bucket |d_ij|;
+            3) add sum_k k * B_k to the result, computed with running sums from the highest bucket down:
+                   S = B_top + ... + B_k, W = S_top + ... + S_1.
+        Each window costs about m + 2^c additions, independent of how the scalars are distributed.
+        If the curve has an endomorphism, each term is first split into two half-length terms.
+        """
+        # Verify points
+        if not all(self.is_point_on_curve(point) for point in points):
+            return None
+
+        # Collect non-trivial terms, splitting with the endomorphism if we have one
+        terms = []
+        for n, point in zip(scalars, points):
+            n = n % self.order
+            if n == 0 or point is None:
+                continue
+            if self.endomorphism is None:
+                terms.append((n, point))
+                continue
+            k1, k2 = self.endomorphism.decompose(n, self.order)
+            x, y = point
+            for k, term_point in ((k1, point), (k2, ((self.endomorphism.beta * x) % self.p, y))):
+                if k < 0:
+                    k, term_point = -k, self.negate_point(term_point)
+                if k:
+                    terms.append((k, term_point))
+        if not terms:
+            return None
+
+        # Recode scalars
+        bits = max(k.bit_length() for k, _ in terms)
+        c = self.select_bucket_window(bits, len(terms))
+        digits = [self._signed_digits(k, c) for k, _ in terms]
+        negated = [self.negate_point(point) for _, point in terms]
+
+        result = None
+        for j in range(max(len(d) for d in digits) - 1, -1, -1):
+            for _ in range(c):
+                result = self._jacobian_double(result)
+
+            # Fill buckets
+            buckets = [None] * ((1 << (c - 1)) + 1)
+            for i, (_, point) in enumerate(terms):
+                if j >= len(digits[i]):
+                    continue
+                digit = digits[i][j]
+                if digit > 0:
+                    buckets[digit] = self._jacobian_add_affine(buckets[digit], point)
+                elif digit < 0:
+                    buckets[-digit] = self._jacobian_add_affine(buckets[-digit], negated[i])
+
+            # Sum buckets
+            running_sum, window_sum = None, None
+            for k in range(len(buckets) - 1, 0, -1):
+                running_sum = self._jacobian_add(running_sum, buckets[k])
+                window_sum = self._jacobian_add(window_sum, running_sum)
+            result = self._jacobian_add(result, window_sum)
+
+        # Return to affine coordinates
+        result = self.to_affine(result)
+
+        # Verify results
+        if not self.is_point_on_curve(result):
+            return None
+
+        return result
+
+    @staticmethod
+    def select_bucket_window(bits: int, terms: int) -> int:
+        """
+        Returns the Pippenger window width c minimising the estimated cost (b/c) * (m + 1.5 * 2^c) for m terms of b-bit
+        scalars, where the m bucket additions are mixed and the 2^c additions summing the buckets are full additions.
+        """
+        return min(range(1, 21), key=lambda c: -(-bits // c) * (terms + 1.5 * (1 << c)))
+
+    def generator_wnaf_table(self) -> list:
+        """
+        Returns the affine odd multiples G, 3G, ..., (2^(w-1) - 1)G for w = GENERATOR_WNAF_WIDTH. The table is built
+        on first use.
+        """
+        if self._generator_wnaf_table is None:
+            self._generator_wnaf_table = self._odd_multiples(self.generator, GENERATOR_WNAF_WIDTH)
+        return self._generator_wnaf_table
+
+    def generator_phi_table(self) -> list | None:
+        """
+        Returns the image of generator_wnaf_table under the endomorphism, or None if the curve has no endomorphism.
+        The table is built on first use.
+        """
+        if self._generator_phi_table is None and self.endomorphism is not None:
+            self._generator_phi_table = self._phi_multiples(self.generator_wnaf_table())
+        return self._generator_phi_table
+
+    def _wnaf_terms(self, n: int, point: tuple, table: PointTable | None = None) -> list:
+        """
+        Returns the _interleaved_wnaf terms for n * P, with 0 < n < order. If the curve has an endomorphism, n is
+        decomposed into (k1, k2) and we return the terms for k1 * P and k2 * phi(P), where the odd multiples of
+        phi(P) are obtained from those of P by multiplying their x-coordinates by beta. A PointTable for P supplies
+        the odd multiples.
+        """
+        if table is not None:
+            w, (odd_table, phi_table) = table.wnaf_width, table.wnaf_tables
+        elif point == self.generator:
+            w, odd_table, phi_table = GENERATOR_WNAF_WIDTH, self.generator_wnaf_table(), self.generator_phi_table()
+        else:
+            w, odd_table, phi_table = None, None, None
+
+        # No endomorphism
+        if self.endomorphism is None:
+            w = w or self.select_window(n.bit_length())
+            odd_table = odd_table or self._odd_multiples(point, w)
+            return [(wnaf(n, w), odd_table)]
+
+        # Split n and map the table through the endomorphism
+        k1, k2 = self.endomorphism.decompose(n, self.order)
+        w = w or self.select_window(max(abs(k1).bit_length(), abs(k2).bit_length()))
+        odd_table = odd_table or self._odd_multiples(point, w)
+        phi_table = phi_table or self._phi_multiples(odd_table)
+
+        # Negative scalars use negated digits
+        terms = []
+        for k, k_table in ((k1, odd_table), (k2, phi_table)):
+            digits = wnaf(abs(k), w)
+            if k < 0:
+                digits = [-d for d in digits]
+            terms.append((digits, k_table))
+        return terms
+
+    def _phi_multiples(self, table: list) -> list:
+        """
+        Returns the image of the affine table under the endomorphism phi(x, y) = (beta * x, y).
+        """
+        beta = self.endomorphism.beta
+        return [None if pt is None else ((beta * pt[0]) % self.p, pt[1]) for pt in table]
+
+    def precompute_point(self, point: tuple, window: int = 0) -> PointTable:
+        """
+        Returns a PointTable for the affine point P, to speed up repeated multiplications of P. The table always
+        holds the odd multiples used in double_scalar_multiplication. With a positive window it also holds the
+        fixed-base table of P for that window, which holds about (bits/w) * 2^(w-1) points.
+        """
+        if point is None or not self.is_point_on_curve(point):
+            raise ValueError(f"Point {point} not found on curve")
+
+        bits = (self.order_bits + 1) // 2 if self.endomorphism else self.order_bits
+        w = self.select_window(bits)
+        odd_table = self._odd_multiples(point, w)
+        phi_table = self._phi_multiples(odd_table) if self.endomorphism else None
+        window_table = self.fixed_base_table(point, window) if window else None
+        return PointTable(point, w, (odd_table, phi_table), window, window_table)
+
+    def _odd_multiples(self, point: tuple, w: int) -> list:
+        """
+        Returns the affine odd multiples P, 3P, ..., (2^(w-1) - 1)P of the affine point P. The multiples are computed
+        in Jacobian coordinates and normalised together, so that the table can be used with mixed additions.
+        """
+        multiple = self.to_jacobian(point)
+        double = self._jacobian_double(multiple)
+        multiples = [multiple]
+        for _ in range((1 << (w - 2)) - 1):
+            multiple = self._jacobian_add(multiple, double)
+            multiples.append(multiple)
+        return self.normalize_points(multiples)
+
+    def _interleaved_wnaf(self, terms: list):
+        """
+        Returns the Jacobian sum of the terms d * P, where each term is given as (digits, table): the wNAF digits of a
+        scalar (least significant first) and the affine odd multiples of P.
+        """
+        # Collect the (signed) table points to add at each digit position
+        schedule = [[] for _ in range(max((len(digits) for digits, _ in terms), default=0))]
+        for digits, table in terms:
+            for i, digit in enumerate(digits):
+                if digit > 0:
+                    schedule[i].append(table[(digit - 1) >> 1])
+                elif digit < 0:
+                    schedule[i].append(self.negate_point(table[(-digit - 1) >> 1]))
+
+        result = None
+        for additions in reversed(schedule):
+            result = self._jacobian_double(result)
+            for point in additions:
+                result = self._jacobian_add_affine(result, point)
+        return result
+
+    # --- Jacobian coordinates --- #
+    # The point formulas are shared with point counting in jacobian.py; __init__ binds them to the curve as
+    # _jacobian_double, _jacobian_add_affine and _jacobian_add.
+
+    @staticmethod
+    def to_jacobian(point: tuple):
+        """
+        Returns the affine point (x, y) as the Jacobian point (x, y, 1).
+        """
+        return jacobian.to_jacobian(point)
+
+    def to_affine(self, point: tuple):
+        """
+        Returns the Jacobian point (X, Y, Z) as the affine point (X/Z^2, Y/Z^3). Uses a single modular inversion.
+        """
+        return jacobian.to_affine(self.p, point)
+
+    def normalize_points(self, points: list) -> list:
+        """
+        Returns the Jacobian points as affine points, sharing a single modular inversion between all of them (see
+        ecc_math.batch_inverse). Points at infinity are returned as None.
+        """
+        return jacobian.normalize_points(self.p, points)
+
+    # --- Formulas with specialised field reduction --- #
+    # The formulas of jacobian.py, reducing with self.field.reduce instead of the built-in modulo. Intermediate
+    # differences are offset by a multiple of p to stay non-negative, as the folds expect non-negative input.
+
+    def _double_a3_field(self, point: tuple):
+        """
+        Jacobian doubling for a = -3 with specialised field reduction. See dbl-2001-b.
+        """
+        if point is None:
+            return None
+        x, y, z = point
+        if y == 0:
+            return None
+        p, reduce = self.p, self.field.reduce
+        delta = reduce(z * z)
+        gamma = reduce(y * y)
+        beta = reduce(x * gamma)
+        alpha = reduce(3 * (x - delta + p) * (x + delta))
+        x3 = reduce(alpha * alpha + 8 * (p - beta))
+        z3 = reduce((y + z) * (y + z) + 2 * p - gamma - delta)
+        y3 = reduce(alpha * (4 * beta + p - x3) + 8 * (p - gamma) * gamma)
+        return x3, y3, z3
+
+    def _jacobian_add_affine_field(self, point1: tuple, point2: tuple):
+        """
+        Mixed addition of a Jacobian point1 and an affine point2 with specialised field reduction.
+        """
+        if point2 is None:
+            return point1
+        if point1 is None:
+            return self.to_jacobian(point2)
+
+        p, reduce = self.p, self.field.reduce
+        x1, y1, z1 = point1
+        x2, y2 = point2
+        z1z1 = reduce(z1 * z1)
+        h = reduce(x2 * z1z1 + p - x1)
+        r = reduce(reduce(y2 * z1) * z1z1 + p - y1)
+
+        # Handle equal x-coordinates
+        if h == 0:
+            return self._jacobian_double(point1) if r == 0 else None
+
+        hh = reduce(h * h)
+        hhh = reduce(h * hh)
+        v = reduce(x1 * hh)
+        x3 = reduce(r * r + 3 * p - hhh - 2 * v)
+        y3 = reduce(r * (v + p - x3) + (p - y1) * hhh)
+        z3 = reduce(z1 * h)
+        return x3, y3, z3
+
+    def _jacobian_add_field(self, point1: tuple, point2: tuple):
+        """
+        Addition of two Jacobian points with specialised field reduction.
+        """
+        if point2 is None:
+            return point1
+        if point1 is None:
+            return point2
+
+        p, reduce = self.p, self.field.reduce
+        x1, y1, z1 = point1
+        x2, y2, z2 = point2
+        z1z1 = reduce(z1 * z1)
+        z2z2 = reduce(z2 * z2)
+        u1 = reduce(x1 * z2z2)
+        s1 = reduce(reduce(y1 * z2) * z2z2)
+        h = reduce(x2 * z1z1 + p - u1)
+        r = reduce(reduce(y2 * z1) * z1z1 + p - s1)
+
+        # Handle equal x-coordinates
+        if h == 0:
+            return self._jacobian_double(point1) if r == 0 else None
+
+        hh = reduce(h * h)
+        hhh = reduce(h * hh)
+        v = reduce(u1 * hh)
+        x3 = reduce(r * r + 3 * p - hhh - 2 * v)
+        y3 = reduce(r * (v + p - x3) + (p - s1) * hhh)
+        z3 = reduce(reduce(z1 * z2) * h)
+        return x3, y3, z3
 
     # # --- Point compression/decompression --- #
     # def compress_point(self, point: tuple):
@@ -7,17 +7,32 @@ from src.library.codec import compress_public_key
 from src.library.curves import CurveType, get_curve
 from src.library.ecc import EllipticCurve
 
+KEYPAIR_CHUNK_SIZE = 256  # Number of public keys normalised together in bulk generation
+
 
 class KeyPair:
     """
     A class for a private and public keypair for use in elliptic curve cryptography
     """
 
-    def __init__(self, private_key: int | None = None, curve_type: CurveType = CurveType.SECP256K1):
+    def __init__(self, private_key: int | None = None,
+                 curve_type: CurveType | EllipticCurve = CurveType.SECP256K1):
         self.curve = get_curve(curve_type)
         self.private_key = private_key if private_key else self.generate_private_key(self.curve)
         self.public_key_point = self.curve.multiply_generator(self.private_key)
-        self.compressed_public_key = compress_public_key(self.public_key_point)
+        self.compressed_public_key = compress_public_key(self.public_key_point, self.curve)
+
+    @classmethod
+    def _from_public_key_point(cls, private_key: int, public_key_point: tuple, curve: EllipticCurve):
+        """
+        Returns a KeyPair for a public key point that has already been computed from the private key.
+        """
+        keypair = cls.__new__(cls)
+        keypair.curve = curve
+        keypair.private_key = private_key
+        keypair.public_key_point = public_key_point
+        keypair.compressed_public_key = compress_public_key(public_key_point, curve)
+        return keypair
 
     @staticmethod
     def generate_private_key(curve: EllipticCurve):
@@ -25,3 +40,34 @@ class KeyPair:
         Generates a random, non-zero, cryptographically secure private key for use in elliptic curve cryptography.
         """
         return next(x for x in (randbits(curve.p.bit_length()) % curve.order for _ in iter(int, 1)) if x != 0)
+
+
+def generate_keypairs(count: int, curve_type: CurveType | EllipticCurve = CurveType.SECP256K1,
+                      start: int | None = None, chunk_size: int = KEYPAIR_CHUNK_SIZE):
+    """
+    Yields count KeyPairs, computing their public keys in chunks of chunk_size.
+
+    If start is None, the private keys are random and each chunk of public keys is computed with the fixed-base
+    generator table and normalised with a single inversion (see EllipticCurve.multiply_generator_batch).
+
+    Otherwise, the private keys are the consecutive integers start, start + 1, ..., start + count - 1, which is useful
+    for deterministic test vectors. Each public key is then the previous one plus the generator, so every key after the
+    first costs a single point addition (see EllipticCurve.generator_multiples).
+    """
+    curve = get_curve(curve_type)
+
+    # Verify incremental range
+    if start is not None and not (1 <= start and start + count <= curve.order):
+        raise ValueError(f"Incremental private keys must lie in the interval [1, {curve.order - 1}]")
+
+    for offset in range(0, count, chunk_size):
+        size = min(chunk_size, count - offset)
+        if start is None:
+            private_keys = [KeyPair.generate_private_key(curve) for _ in range(size)]
+            public_keys = curve.multiply_generator_batch(private_keys)
+        else:
+            private_keys = range(start + offset, start + offset + size)
+            public_keys = curve.generator_multiples(start + offset, size)
+
+        for private_key, public_key_point in zip(private_keys, public_keys):
+            yield KeyPair._from_public_key_point(private_key, public_key_point, curve)
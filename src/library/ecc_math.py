@@ -1,6 +1,10 @@
 """
 Standalone math functions used in ECC
 """
+import secrets
+from functools import lru_cache
+
+MAX_PRIME = pow(2, 19) - 1  # 7th Mersenne Prime; curves over smaller primes are counted by enumeration
 
 
 def legendre_symbol(a: int, p: int) -> int:
@@ -9,47 +13,259 @@ def legendre_symbol(a: int, p: int) -> int:
     return ec - p if ec > 1 else ec
 
 
+def jacobi_symbol(a: int, n: int) -> int:
+    """
+    Calculates the Jacobi symbol (a | n) for odd n > 0 with the binary algorithm, which only uses shifts, bit tests
+    and reductions of the smaller argument. For prime n this is the Legendre symbol. Returns -1, 0 or 1.
+
+    Algorithm:
+    ---------
+        1) Remove the factors of 2 from a; each one flips the sign if n = 3 or 5 (mod 8)
+        2) Swap a and n by quadratic reciprocity, flipping the sign if a = n = 3 (mod 4), and reduce a modulo n
+        3) Repeat until a = 0; the symbol is the sign if n = 1, and 0 otherwise
+    """
+    a %= n
+    result = 1
+    while a:
+        zeros = (a & -a).bit_length() - 1
+        a >>= zeros
+        if zeros & 1 and n & 7 in (3, 5):
+            result = -result
+        if a & n & 2:
+            result = -result
+        a, n = n % a, a
+    return result if n == 1 else 0
+
+
+class SquareRoot:
+
+    def __init__(self, p: int):
+        """
+        Square roots modulo the odd prime p. The method is chosen from the form of p and its parameters are computed
+        once here:
+
+            p = 3 (mod 4)   r = n^((p+1)/4)
+            p = 5 (mod 8)   Atkin's method, with 2 as a known non-residue
+            otherwise       Tonelli-Shanks with a precomputed non-residue and its powers, or Cipolla's method when
+                            the 2-adicity s of p - 1 is high, as Tonelli-Shanks takes O(s^2) squarings.
+
+        Use square_root_context to get the shared instance for a prime.
+        """
+        self.p = p
+
+        # Decompose p - 1 as q * 2^s, where q is odd
+        q, s = p - 1, 0
+        while q % 2 == 0:
+            q //= 2
+            s += 1
+        self.q = q
+        self.s = s
+
+        if p % 4 == 3:
+            self.method = "p3mod4"
+            self.exponent = (p + 1) // 4
+        elif p % 8 == 5:
+            self.method = "atkin"
+            self.exponent = (p - 5) // 8
+        elif s * s < 8 * p.bit_length():
+            self.method = "tonelli_shanks"
+            # Find the least quadratic non-residue z and the powers c^(2^j) of c = z^q
+            z = next(x for x in range(2, p) if jacobi_symbol(x, p) == -1)
+            self.c_powers = [pow(z, q, p)]
+            for _ in range(s - 1):
+                self.c_powers.append((self.c_powers[-1] * self.c_powers[-1]) % p)
+        else:
+            self.method = "cipolla"
+
+    def __repr__(self):
+        return f"SquareRoot(p={hex(self.p)}, method={self.method})"
+
+    def __call__(self, n: int):
+        """
+        Returns r with r^2 = n (mod p), or None if n is not a quadratic residue. For p = 3 or 5 (mod 8) no separate
+        residuosity test is needed: the candidate root is squared to check it.
+        """
+        p = self.p
+        n %= p
+        if n == 0:
+            return 0
+
+        if self.method == "p3mod4":
+            r = pow(n, self.exponent, p)
+        elif self.method == "atkin":
+            r = self._atkin(n)
+        elif jacobi_symbol(n, p) != 1:
+            return None
+        elif self.method == "tonelli_shanks":
+            r = self._tonelli_shanks(n)
+        else:
+            r = self._cipolla(n)
+        return r if (r * r) % p == n else None
+
+    def _atkin(self, n: int) -> int:
+        """
+        Algorithm:
+        ---------
+            1) b = (2n)^((p-5)/8)
+            2) i = 2n * b^2, which is a square root of -1 if n is a residue
+            3) r = n * b * (i - 1)
+        """
+        p = self.p
+        b = pow(2 * n, self.exponent, p)
+        i = (2 * n * b * b) % p
+        return (n * b * (i - 1)) % p
+
+    def _tonelli_shanks(self, n: int) -> int:
+        """
+        Algorithm:
+        ---------
+            1) Let m = s, c = z^q, t = n^q and r = n^((q+1)/2)
+            2) Until t = 1, find the least i with t^(2^i) = 1 and let b = c^(2^(m-i-1)), which is precomputed.
+               Update m = i, c = b^2, t = t * b^2 and r = r * b.
+        """
+        p, c_powers = self.p, self.c_powers
+        m, t, r = self.s, pow(n, self.q, p), pow(n, (self.q + 1) // 2, p)
+        while t != 1:
+            i, factor = 0, t
+            while factor != 1:
+                factor = (factor * factor) % p
+                i += 1
+
+            # c = z^(q * 2^(s-m)), so b = c^(2^(m-i-1)) = z^(q * 2^(s-i-1))
+            b = c_powers[self.s - i - 1]
+            m = i
+            t = (t * b * b) % p
+            r = (r * b) % p
+        return r
+
+    def _cipolla(self, n: int) -> int:
+        """
+        Algorithm:
+        ---------
+            1) Find a such that d = a^2 - n is a quadratic non-residue
+            2) Return (a + w)^((p+1)/2) in F_p[w] / (w^2 - d), which lies in F_p
+        """
+        p = self.p
+        while True:
+            a = secrets.randbelow(p)
+            d = (a * a - n) % p
+            if jacobi_symbol(d, p) == -1:
+                break
+
+        # Square and multiply, with elements x0 + x1 * w
+        x0, x1 = 1, 0
+        exponent = (p + 1) // 2
+        for i in range(exponent.bit_length() - 1, -1, -1):
+            x0, x1 = (x0 * x0 + d * ((x1 * x1) % p)) % p, (2 * x0 * x1) % p
+            if (exponent >> i) & 1:
+                x0, x1 = (a * x0 + d * x1) % p, (x0 + a * x1) % p
+        return x0
+
+
+@lru_cache(maxsize=None)
+def square_root_context(p: int) -> SquareRoot:
+    """
+    Returns the shared SquareRoot for the prime p, whose parameters are computed on first use.
+    """
+    return SquareRoot(p)
+
+
 def tonelli_shanks(n: int, p: int):
     """
-    Computes the square root of n modulo p using the Tonelli-Shanks algorithm.
+    Computes the square root of n modulo p.
     If n is a quadratic residue mod p, returns an integer r such that r^2 ≡ n (mod p).
     Returns None if no solution exists or if p | n.
     """
-
-    # Verify n is a quadratic residue and coprime to n
-    if legendre_symbol(n, p) != 1:
+    if n % p == 0:
         return None
+    return square_root_context(p)(n)
+
+
+MILLER_RABIN_BASES = (2, 3, 5, 7, 11, 13, 17, 19, 23, 29, 31, 37, 41)  # Deterministic for n < 3.3 * 10^24
+MILLER_RABIN_ROUNDS = 32  # Additional random bases for larger n
 
-    # p = 3 (mod 4) case
-    if p % 4 == 3:
-        return pow(n, (p + 1) // 4, p)
 
-    # Step 1: Decompose p-1 as q * 2^s, where q is odd
-    q, s = p - 1, 0
-    while q % 2 == 0:
-        q //= 2
-        s += 1
+def is_prime(n: int) -> bool:
+    """
+    Returns True if n is prime, using the Miller-Rabin test. The result is exact for n < 3.3 * 10^24 and holds
+    with error probability below 4^(-MILLER_RABIN_ROUNDS) for larger n.
+    """
+    if n < 2:
+        return False
+    for q in MILLER_RABIN_BASES:
+        if n % q == 0:
+            return n == q
+
+    # Write n - 1 = 2^s * d with d odd
+    s = ((n - 1) & (1 - n)).bit_length() - 1
+    d = (n - 1) >> s
+    bases = list(MILLER_RABIN_BASES)
+    if n >= 3317044064679887385961981:
+        bases += [secrets.randbelow(n - 3) + 2 for _ in range(MILLER_RABIN_ROUNDS)]
+    for base in bases:
+        x = pow(base, d, n)
+        if x == 1 or x == n - 1:
+            continue
+        for _ in range(s - 1):
+            x = (x * x) % n
+            if x == n - 1:
+                break
+        else:
+            return False
+    return True
 
-    # Step 2: Find a quadratic non-residue z (legendre_symbol(z, p) == -1)
-    z = next(x for x in range(2, p) if legendre_symbol(x, p) == p - 1)
 
-    # 3) Configure initial variables: m = s, c = z^q (mod p), t = n^q (mod p), r = n^(q+1)/2 (mod p)
-    m, c, t, r = s, pow(z, q, p), pow(n, q, p), pow(n, (q + 1) // 2, p)
+def wnaf(n: int, w: int) -> list:
+    """
+    Returns the width-w non-adjacent form of the non-negative integer n, least significant digit first.
+    Every non-zero digit is odd and lies in (-2^(w-1), 2^(w-1)), and any w consecutive digits contain at most one
+    non-zero digit.
+    """
+    radix = 1 << w
+    half = radix >> 1
+    digits = []
+    while n > 0:
+        # Skip runs of zeros at once
+        zeros = (n & -n).bit_length() - 1
+        if zeros:
+            digits.extend([0] * zeros)
+            n >>= zeros
+        digit = n & (radix - 1)
+        if digit >= half:
+            digit -= radix
+        digits.append(digit)
+        n = (n - digit) >> 1
+    return digits
 
-    # 4) Repeat until t == 1
-    while t != 1:
 
-        # First find the least integer i such that t^(2^i) = 1 (mod p)
-        i, factor = 0, t
-        while factor != 1:
-            factor = pow(factor, 2, p)
-            i += 1
+def batch_inverse(values: list, modulus: int) -> list:
+    """
+    Returns the inverses of the given values modulo the modulus, using Montgomery's trick: a single modular
+    inversion plus 3(n-1) multiplications. Raises a ValueError if any value is not invertible.
+
+    Algorithm:
+    ---------
+    1) Compute the prefix products c_i = v_1 * ... * v_i.
+    2) Invert the full product once: t = c_n^(-1).
+    3) Walk backwards: v_i^(-1) = t * c_(i-1), then t = t * v_i.
+    """
+    if not values:
+        return []
+
+    # 1) Prefix products
+    prefix = [values[0] % modulus]
+    for value in values[1:]:
+        prefix.append((prefix[-1] * value) % modulus)
 
-        # Update variables
-        b = pow(c, 2 ** (m - i - 1), p)
-        m = i
-        c = (b * b) % p
-        t = (t * c) % p
-        r = (r * b) % p
+    # 2) Single inversion
+    if prefix[-1] == 0:
+        raise ValueError("Batch inversion of a value that is not invertible")
+    t = pow(prefix[-1], -1, modulus)
 
-    return r
+    # 3) Recover individual inverses
+    inverses = [0] * len(values)
+    for i in range(len(values) - 1, 0, -1):
+        inverses[i] = (t * prefix[i - 1]) % modulus
+        t = (t * values[i]) % modulus
+    inverses[0] = t
+    return inverses
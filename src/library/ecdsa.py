@@ -2,21 +2,107 @@
 ECDSA Signature and verify signature algorithms
 """
 import logging
+import random
 import secrets
 import sys
+import threading
+from enum import Enum
 
 from src.library.curves import CurveType, get_curve
+from src.library.ecc import EllipticCurve, PointTable
+from src.library.ecc_math import batch_inverse
+from src.library.nonce_pool import NoncePool
+
+# --- BATCH VERIFICATION --- #
+BATCH_SPLIT_MIN = 4  # Failing batches of at most this size are verified item by item
 
 # --- DEFAULT LOGGING --- #
-log_level = logging.DEBUG
+log_level = logging.INFO
 logger = logging.getLogger(__name__)
 logger.setLevel(log_level)
 logger.addHandler(logging.StreamHandler(stream=sys.stdout))
 
 
+# --- SIGNING SELF-CHECK --- #
+DEFAULT_CHECK_RATE = 0.01  # Fraction of signatures verified under the default policy
+
+
+class VerificationMode(Enum):
+    OFF = "off"
+    SAMPLED = "sampled"
+    ALWAYS = "always"
+
+
+class VerificationPolicy:
+
+    def __init__(self, mode: VerificationMode = VerificationMode.SAMPLED, rate: float = DEFAULT_CHECK_RATE):
+        """
+        Decides which new signatures are verified before being returned, as a check against faults in signing. A
+        self-check costs a multiplication for the public key and a verification, about twice the cost of signing.
+
+        mode : OFF never checks, ALWAYS checks every signature and SAMPLED checks each signature with probability
+            rate.
+        rate : the sampling rate in [0, 1], used in SAMPLED mode.
+
+        The counters of checks performed and failures belong to the policy. A policy sent to another process starts
+        with fresh counters there.
+        """
+        if not 0 <= rate <= 1:
+            raise ValueError(f"Sampling rate {rate} not in the interval [0, 1]")
+        self.mode = VerificationMode(mode)
+        self.rate = rate
+        self.checks = 0
+        self.failures = 0
+        self._lock = threading.Lock()
+
+    def __repr__(self):
+        return f"VerificationPolicy(mode={self.mode.value}, rate={self.rate})"
+
+    def __getstate__(self):
+        return {'mode': self.mode, 'rate': self.rate}
+
+    def __setstate__(self, state):
+        self.__init__(state['mode'], state['rate'])
+
+    def should_check(self) -> bool:
+        if self.mode == VerificationMode.ALWAYS:
+            return True
+        if self.mode == VerificationMode.SAMPLED:
+            return random.random() < self.rate
+        return False
+
+    def record(self, passed: bool):
+        with self._lock:
+            self.checks += 1
+            if not passed:
+                self.failures += 1
+
+    def stats(self) -> dict:
+        return {
+            'mode': self.mode.value,
+            'rate': self.rate,
+            'checks': self.checks,
+            'failures': self.failures
+        }
+
+
+# The policy used when none is given to the signing functions
+verification_policy = VerificationPolicy()
+
+
+def set_verification_policy(policy: VerificationPolicy):
+    """
+    Replaces the default signing self-check policy of this process.
+    """
+    global verification_policy
+    verification_policy = policy
+
+
 # --- ECDSA --- #
-def generate_signature(private_key: int, hex_string: str, curve_type: CurveType = CurveType.SECP256K1,
-                       _logger: logging.Logger = logger) -> tuple:
+def generate_signature(private_key: int, hex_string: str,
+                       curve_type: CurveType | EllipticCurve = CurveType.SECP256K1,
+                       _logger: logging.Logger = logger, nonce_pool: NoncePool | None = None,
+                       policy: VerificationPolicy | None = None) -> tuple:
     """
     Generates an ECDSA signature for a given private_key and hex_string on the specified curve.
 
@@ -26,8 +112,12 @@ def generate_signature(private_key: int, hex_string: str, curve_type: CurveType
         The signer's private key.
     hex_string : str
         The message in hex format that will be signed.
-    curve_type : CurveType
-        The elliptic curve type (default: SECP256K1).
+    curve_type : CurveType | EllipticCurve
+        The elliptic curve type or a shared curve context (default: SECP256K1).
+    nonce_pool : NoncePool | None
+        Optional; a pool of precomputed (k, r, k^(-1)) for the same curve, replacing steps 3 to 5 with a lookup.
+    policy : VerificationPolicy | None
+        Optional; decides whether the signature is verified before it is returned (default: verification_policy).
 
     Returns:
     --------
@@ -44,6 +134,23 @@ def generate_signature(private_key: int, hex_string: str, curve_type: CurveType
     6) If r or s is 0, repeat from step 3.
     7) Return the signature (r, s).
     """
+    r, s, _ = generate_recoverable_signature(private_key, hex_string, curve_type, _logger, nonce_pool, policy)
+    return r, s
+
+
+def generate_recoverable_signature(private_key: int, hex_string: str,
+                                   curve_type: CurveType | EllipticCurve = CurveType.SECP256K1,
+                                   _logger: logging.Logger = logger, nonce_pool: NoncePool | None = None,
+                                   policy: VerificationPolicy | None = None) -> tuple:
+    """
+    Generates an ECDSA signature (r, s) as in generate_signature, together with the recovery id of the point
+    R = k * generator = (x, y):
+
+        recovery_id = (y mod 2) + 2 * (1 if x >= n else 0).
+
+    The recovery id lets a verifier reconstruct R from r, which is required for batch verification. As in
+    generate_signature, an optional nonce_pool supplies precomputed nonces and the policy decides on the self-check.
+    """
     # Get curve
     curve = get_curve(curve_type)
 
@@ -51,46 +158,59 @@ def generate_signature(private_key: int, hex_string: str, curve_type: CurveType
     n = curve.order
 
     # 2) Take the first n bits of the hex string using a binary mask
-    z = int(hex_string, 16) & ((1 << n.bit_length()) - 1)
+    z = int(hex_string, 16) & curve.order_mask
 
     # 3 ) Generate the signature
-    r, s = None, None
+    if nonce_pool is not None and nonce_pool.curve is not curve:
+        raise ValueError("Nonce pool belongs to a different curve")
+    r, s, recovery_id = None, None, None
     while True:
-        # Select a random k in [1, n-1]
-        k = secrets.randbelow(n)
-        if k == 0:
-            continue  # Ensure k is non-zero and invertible
-
-        # 4) Calculate the curve point (x, y) = k * generator
-        x, y = curve.multiply_generator(k)
-
-        # 5) Compute r and s
-        r = x % n
-        if r == 0:
-            continue  # Go to step 3 if r is 0
+        if nonce_pool is not None:
+            # Take a precomputed k with r and k^(-1); a nonce is never reused
+            k, r, k_inv, recovery_id = nonce_pool.take()
+        else:
+            # Select a random k in [1, n-1]
+            k = secrets.randbelow(n)
+            if k == 0:
+                continue  # Ensure k is non-zero and invertible
+
+            # 4) Calculate the curve point (x, y) = k * generator
+            x, y = curve.multiply_generator(k)
+            recovery_id = (y & 1) | (2 if x >= n else 0)
+
+            # 5) Compute r
+            r = x % n
+            if r == 0:
+                continue  # Go to step 3 if r is 0
+            k_inv = pow(k, -1, n)
 
         # Compute s = k^(-1) * (z + r * private_key) mod n
-        s = (pow(k, -1, n) * (z + r * private_key)) % n
+        s = (k_inv * (z + r * private_key)) % n
         if s == 0:
             continue  # Go to step 3 if s is 0
 
         # Valid signature found, exit loop
         break
 
-    # -- DEBUG: Verify signature
-    if _logger.level == logging.DEBUG:
+    # -- Self-check: Verify signature
+    policy = verification_policy if policy is None else policy
+    if policy.should_check():
         _logger.debug("Verifying ECDSA")
         public_key = curve.multiply_generator(private_key)
-        signed = verify_signature(signature=(r, s), hex_string=hex_string, public_key=public_key, curve_type=curve_type)
-        assert signed, _logger.error("Failed to verify ECDSA")
+        signed = verify_signature(signature=(r, s), hex_string=hex_string, public_key=public_key, curve_type=curve)
+        policy.record(signed)
+        if not signed:
+            _logger.error("Failed to verify ECDSA")
+            raise RuntimeError("ECDSA self-check failed; signature discarded")
         _logger.debug("ECDSA has been successfully verified.")
 
-    # 6) Return the signature (r,s)
-    return r, s
+    # 6) Return the signature (r,s) and the recovery id
+    return r, s, recovery_id
 
 
 def verify_signature(signature: tuple, hex_string: str, public_key: tuple,
-                     curve_type: CurveType = CurveType.SECP256K1, _logger: logging.Logger = logger) -> bool:
+                     curve_type: CurveType | EllipticCurve = CurveType.SECP256K1,
+                     _logger: logging.Logger = logger, public_key_table: PointTable | None = None) -> bool:
     """
     We verify that the given signature corresponds to the correct public_key for the given hex_string.
 
@@ -102,10 +222,12 @@ def verify_signature(signature: tuple, hex_string: str, public_key: tuple,
         The transaction hash in hex format.
     public_key : tuple
         The public key used for verification.
-    curve_type : CurveType
-        The elliptic curve type (default: SECP256K1).
+    curve_type : CurveType | EllipticCurve
+        The elliptic curve type or a shared curve context (default: SECP256K1).
     _logger : logging.Logger
         Optional; for use in debugging
+    public_key_table : PointTable | None
+        Optional; precomputed multiples of the public key (see key_cache.PublicKeyCache).
 
     Returns
     -------
@@ -139,7 +261,7 @@ def verify_signature(signature: tuple, hex_string: str, public_key: tuple,
         return False
 
     # 2) Take the first n bits of the transaction hash using a binary mask
-    z = int(hex_string, 16) & ((1 << n.bit_length()) - 1)
+    z = int(hex_string, 16) & curve.order_mask
 
     # 3) Calculate u1 and u2
     s_inv = pow(s, -1, n)
@@ -147,9 +269,7 @@ def verify_signature(signature: tuple, hex_string: str, public_key: tuple,
     u2 = (r * s_inv) % n
 
     # 4) Calculate the point
-    p1 = curve.multiply_generator(u1)
-    p2 = curve.scalar_multiplication(u2, public_key)
-    point = curve.add_points(p1, p2)
+    point = curve.double_scalar_multiplication(u1, curve.generator, u2, public_key, public_key_table)
 
     # 5) Check if r matches x (mod n), and handle point at infinity
     if point is None:
@@ -160,9 +280,128 @@ def verify_signature(signature: tuple, hex_string: str, public_key: tuple,
     return r == x % n
 
 
+def verify_signatures_batch(items: list, curve_type: CurveType | EllipticCurve = CurveType.SECP256K1,
+                            _logger: logging.Logger = logger) -> list:
+    """
+    We verify many signatures at once, returning a list of booleans in the same order as the items.
+
+    Parameters
+    ----------
+    items : list
+        Tuples (signature, hex_string, public_key) or (signature, hex_string, public_key, recovery_id), with the
+        same meaning as in verify_signature and generate_recoverable_signature.
+    curve_type : CurveType | EllipticCurve
+        The elliptic curve type or a shared curve context (default: SECP256K1).
+    _logger : logging.Logger
+        Optional; for use in debugging
+
+    Returns
+    -------
+    list
+        True for each valid signature, False otherwise.
+
+    Algorithm
+    --------
+    Items with a recovery id have a recoverable point R = (x, y), with x = r + n * (recovery_id >> 1) and the parity
+    of y given by recovery_id & 1. The signature is valid iff u1_i * G + u2_i * Q_i - R_i is the point at infinity.
+
+    1) Verify (r, s) ranges and recover R_i for every item with a recovery id.
+    2) Choose random 128-bit a_i (with a_1 = 1) and check the single multi-scalar equation
+            (sum a_i * u1_i) * G + sum (a_i * u2_i) * Q_i - sum a_i * R_i = infinity,
+       with the terms for repeated public keys merged. A forged item only passes with probability about 2^-128.
+    3) If the equation fails, split the batch in halves and check each half, until the failing groups are small
+       enough to verify their items individually.
+    Items without a recovery id, or whose R cannot be recovered, are verified individually.
+    """
+    curve = get_curve(curve_type)
+    n = curve.order
+
+    results = [False] * len(items)
+    batch = []
+    single = []
+    for index, item in enumerate(items):
+        signature, hex_string, public_key = item[:3]
+        recovery_id = item[3] if len(item) > 3 else None
+        r, s = signature
+
+        # 1) Verify our values first
+        if not (1 <= r < n and 1 <= s < n):
+            _logger.error(f"ECDSA signature {index} out of bounds.")
+            continue
+        if public_key is None or not curve.is_point_on_curve(public_key):
+            _logger.error(f"Public key {index} not found on curve.")
+            continue
+
+        # Recover R if possible
+        R = None
+        if recovery_id is not None and 0 <= recovery_id < 4:
+            x = r + n * (recovery_id >> 1)
+            y = curve.find_y_from_x(x) if x < curve.p else None
+            if y is not None:
+                R = (x, y if y & 1 == recovery_id & 1 else curve.p - y)
+        if R is None:
+            single.append(index)
+            continue
+
+        z = int(hex_string, 16) & curve.order_mask
+        batch.append((index, z, r, s, public_key, R))
+
+    # Calculate u1 and u2, sharing a single inversion
+    s_invs = batch_inverse([s for _, _, _, s, _, _ in batch], n)
+    batch = [
+        (index, (z * s_inv) % n, (r * s_inv) % n, public_key, R)
+        for (index, z, r, _, public_key, R), s_inv in zip(batch, s_invs)
+    ]
+
+    # 2) Check the random linear combination, splitting failing groups to isolate the invalid items
+    pending = [batch] if batch else []
+    while pending:
+        group = pending.pop()
+        if _batch_equation_holds(group, curve):
+            for index, *_ in group:
+                results[index] = True
+        elif len(group) <= BATCH_SPLIT_MIN:
+            # 3) Fall back to individual verification
+            single.extend(index for index, *_ in group)
+        else:
+            _logger.debug(f"Batch verification failed for {len(group)} signatures; splitting batch.")
+            half = len(group) // 2
+            pending.extend((group[:half], group[half:]))
+
+    for index in single:
+        signature, hex_string, public_key = items[index][:3]
+        results[index] = verify_signature(signature, hex_string, public_key, curve, _logger)
+
+    return results
+
+
+def _batch_equation_holds(batch: list, curve: EllipticCurve) -> bool:
+    """
+    Returns True if the random linear combination of the batch entries (index, u1, u2, public_key, R) sums to the
+    point at infinity. See verify_signatures_batch.
+    """
+    n = curve.order
+    generator_scalar = 0
+    key_scalars = {}
+    scalars, points = [], []
+    for i, (_, u1, u2, public_key, R) in enumerate(batch):
+        a = 1 if i == 0 else secrets.randbits(128) | 1
+        generator_scalar += a * u1
+        key_scalars[public_key] = key_scalars.get(public_key, 0) + a * u2
+        scalars.append(n - a)
+        points.append(R)
+    scalars.extend(key_scalars.values())
+    points.extend(key_scalars.keys())
+    scalars.append(generator_scalar)
+    points.append(curve.generator)
+
+    return curve.multi_scalar_multiply(scalars, points) is None
+
+
 if __name__ == "__main__":
     from src.library.ecc_keys import KeyPair
 
     _keypair = KeyPair()
     _hex_string = 'deadbeef'
-    sig = generate_signature(_keypair.private_key, _hex_string, _logger=logger)
+    sig = generate_signature(_keypair.private_key, _hex_string, _logger=logger,
+                             policy=VerificationPolicy(VerificationMode.ALWAYS))
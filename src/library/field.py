@@ -0,0 +1,204 @@
+"""
+Prime field arithmetic with modular reduction specialised to the form of the prime.
+
+Every prime in curves.py has a special form, which allows reduction by folding the high bits of a value onto the
+low bits instead of dividing by p:
+
+    Mersenne          p = 2^k - 1                     (secp521r1)
+    Solinas           p = 2^k - f, f a sparse sum of signed powers of 2 (secp*r1)
+    Pseudo-Mersenne   p = 2^k - c, c small             (secp*k1)
+
+Use field_for_prime to get the field for a prime, classified automatically. Python's built-in modulo is already
+implemented in C, so a fold written in Python only pays off when the division it replaces is large enough. Each
+field class records in replaces_modulo whether it beat the built-in modulo in the benchmark run by this module;
+the curve arithmetic uses the specialised reduction only for those fields.
+"""
+
+SOLINAS_MAX_TERMS = 4  # Maximum number of signed powers of 2 in f for a Solinas prime
+
+
+class PrimeField:
+    """
+    The field F_p for an arbitrary prime p, with reduction by the built-in modulo.
+    """
+    kind = "generic"
+    replaces_modulo = False
+
+    def __init__(self, p: int):
+        self.p = p
+        self.bits = p.bit_length()
+        self.mask = (1 << self.bits) - 1
+
+    def __repr__(self):
+        return f"{type(self).__name__}(p={hex(self.p)})"
+
+    def reduce(self, x: int) -> int:
+        """
+        Returns x mod p for any integer x.
+        """
+        return x % self.p
+
+    def add(self, a: int, b: int) -> int:
+        return self.reduce(a + b)
+
+    def sub(self, a: int, b: int) -> int:
+        return self.reduce(a - b)
+
+    def mul(self, a: int, b: int) -> int:
+        return self.reduce(a * b)
+
+    def sqr(self, a: int) -> int:
+        return self.reduce(a * a)
+
+
+class MersenneField(PrimeField):
+    """
+    The field F_p for a Mersenne prime p = 2^k - 1. As 2^k = 1 (mod p), we reduce by adding the high bits to the low
+    bits.
+    """
+    kind = "mersenne"
+    replaces_modulo = True
+
+    def reduce(self, x: int) -> int:
+        """
+        Algorithm:
+        ---------
+            1) Write x = hi * 2^k + lo and replace x with lo + hi, until x < 2^k
+            2) Return 0 if x = p, otherwise x
+        Negative values are left to the built-in modulo.
+        """
+        if x < 0:
+            return x % self.p
+        k, p = self.bits, self.p
+        while x >> k:
+            x = (x & p) + (x >> k)
+        return 0 if x == p else x
+
+
+class PseudoMersenneField(PrimeField):
+    """
+    The field F_p for a pseudo-Mersenne prime p = 2^k - c with c small. As 2^k = c (mod p), we reduce by adding c
+    times the high bits to the low bits.
+    """
+    kind = "pseudo-mersenne"
+    replaces_modulo = False
+
+    def __init__(self, p: int):
+        super().__init__(p)
+        self.c = (1 << self.bits) - p
+
+    def reduce(self, x: int) -> int:
+        """
+        Algorithm:
+        ---------
+            1) Write x = hi * 2^k + lo and replace x with lo + c * hi, until x < 2^k
+            2) Subtract p once if x >= p
+        Negative values are left to the built-in modulo.
+        """
+        if x < 0:
+            return x % self.p
+        k, mask, c = self.bits, self.mask, self.c
+        while x >> k:
+            x = (x & mask) + (x >> k) * c
+        return x - self.p if x >= self.p else x
+
+
+class SolinasField(PrimeField):
+    """
+    The field F_p for a Solinas (generalized Mersenne) prime p = 2^k - f, where f is a sum of a few signed powers of
+    2. As 2^k = f (mod p), we reduce by adding shifted copies of the high bits to the low bits, with no
+    multiplication.
+    """
+    kind = "solinas"
+    replaces_modulo = False
+
+    def __init__(self, p: int, terms: list):
+        """
+        The terms are the pairs (sign, exponent) with f = sum(sign * 2^exponent).
+        """
+        super().__init__(p)
+        self.terms = tuple(terms)
+
+    def reduce(self, x: int) -> int:
+        """
+        Algorithm:
+        ---------
+            1) Write x = hi * 2^k + lo and replace x with lo + sum(sign * (hi << exponent)), until x < 2^k
+            2) Subtract p once if x >= p
+        A fold may go negative on the way down; negative values are left to the built-in modulo.
+        """
+        k, mask, terms = self.bits, self.mask, self.terms
+        while x >> k > 0:
+            hi = x >> k
+            x = x & mask
+            for sign, exponent in terms:
+                if sign > 0:
+                    x += hi << exponent
+                else:
+                    x -= hi << exponent
+        if x < 0:
+            return x % self.p
+        return x - self.p if x >= self.p else x
+
+
+def signed_binary_terms(n: int) -> list:
+    """
+    Returns the non-adjacent form of the positive integer n as pairs (sign, exponent), which has the fewest
+    non-zero terms of any signed binary representation.
+    """
+    terms = []
+    exponent = 0
+    while n:
+        if n & 1:
+            sign = 2 - (n & 3)
+            terms.append((sign, exponent))
+            n -= sign
+        n >>= 1
+        exponent += 1
+    return terms
+
+
+def field_for_prime(p: int) -> PrimeField:
+    """
+    Returns the field F_p with the reduction suited to the form of p. With k the bit length of p and f = 2^k - p,
+    the prime is Mersenne if f = 1, Solinas if f has at most SOLINAS_MAX_TERMS signed binary terms and
+    pseudo-Mersenne if f < 2^(k/2). Any other prime gets the generic field.
+    """
+    k = p.bit_length()
+    f = (1 << k) - p
+    if f == 1:
+        return MersenneField(p)
+    terms = signed_binary_terms(f)
+    if len(terms) <= SOLINAS_MAX_TERMS:
+        return SolinasField(p, terms)
+    if f.bit_length() <= k // 2:
+        return PseudoMersenneField(p)
+    return PrimeField(p)
+
+
+if __name__ == "__main__":
+    # Benchmark specialised reduction against the built-in modulo for each curve prime
+    import secrets
+    import timeit
+
+    from src.library.curves import CurveType, get_curve
+
+    samples = 2000
+    repeats = 20
+    print(f"{'curve':<12}{'field':<18}{'modulo (ns)':>14}{'reduce (ns)':>14}{'speedup':>10}")
+    for curve_type in CurveType:
+        prime = get_curve(curve_type).p
+        field = field_for_prime(prime)
+        generic = PrimeField(prime)
+
+        # Products of two field elements, as reduced throughout the point arithmetic
+        products = [secrets.randbelow(prime) * secrets.randbelow(prime) for _ in range(samples)]
+        assert all(field.reduce(x) == x % prime for x in products)
+        assert all(field.reduce(-x) == -x % prime for x in products[:100])
+
+        generic_reduce = generic.reduce
+        field_reduce = field.reduce
+        generic_time = min(timeit.repeat(lambda: [generic_reduce(x) for x in products], number=1, repeat=repeats))
+        field_time = min(timeit.repeat(lambda: [field_reduce(x) for x in products], number=1, repeat=repeats))
+        print(f"{curve_type.value:<12}{field.kind:<18}{generic_time / samples * 1e9:>14.0f}"
+              f"{field_time / samples * 1e9:>14.0f}{generic_time / field_time:>9.2f}x")
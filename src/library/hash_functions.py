@@ -2,6 +2,9 @@
 Various hashing methods used in Bitcoin
 """
 import hashlib
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from enum import Enum
 
 from src.library.data_formats import Data
@@ -14,27 +17,30 @@ class HashType(Enum):
     HASH160 = "hash160"
 
 
-def hash_function(data: Data, hashtype: HashType) -> str:
-    # Get encoded data
-    # data = bytes.fromhex(data) if isinstance(data, str) else data
-
-    # Match hashtype | return hex digest
+def get_hash(hashtype: HashType):
+    """
+    Returns the bytes in / bytes out function for the hash type.
+    """
     match hashtype:
         case HashType.SHA256:
-            return sha256(data.bytes).hex()
+            return sha256
         case HashType.HASH256:
-            return hash256(data.bytes).hex()
+            return hash256
         case HashType.RIPEMD160:
-            return ripemd160(data.bytes).hex()
+            return ripemd160
         case HashType.HASH160:
-            return hash160(data.bytes).hex()
+            return hash160
         case _:
             raise ValueError("Invalid hash type specified.")
 
 
+def hash_function(data: Data, hashtype: HashType) -> str:
+    # Match hashtype | return hex digest
+    return get_hash(hashtype)(data.view).hex()
+
+
 def checksum(data: Data, hashtype: HashType = HashType.HASH256, byte_num: int = 4) -> bytes:
-    hashed_data = Data(hash_function(data, hashtype))
-    return hashed_data.bytes[:byte_num]
+    return get_hash(hashtype)(data.view)[:byte_num]
 
 
 # -- All hash functions are bytes in / bytes out
@@ -56,6 +62,131 @@ def hash160(data: bytes) -> bytes:
     return ripemd160(sha256(data))
 
 
+# --- Multi-digest hashing --- #
+
+HASH_CHUNK_SIZE = 1 << 20  # Bytes read per update when hashing a stream
+
+
+class MultiHasher:
+    """
+    Computes the sha256, hash256, ripemd160 and hash160 digests of one input in a single pass.
+
+    The input is fed once to a SHA-256 state and a RIPEMD-160 state. hash256 and hash160 only hash the 32-byte SHA-256
+    digest again, so the input is never hashed with SHA-256 more than once. hashlib releases the GIL while hashing
+    large updates, so streams can be hashed in a worker thread.
+    """
+
+    def __init__(self):
+        self._sha256 = hashlib.sha256()
+        self._ripemd160 = hashlib.new("ripemd160")
+        self.size = 0
+
+    def update(self, data: bytes):
+        self._sha256.update(data)
+        self._ripemd160.update(data)
+        self.size += len(data)
+
+    def digests(self) -> dict:
+        """
+        Returns the four digests as bytes, keyed by HashType value.
+        """
+        sha256_digest = self._sha256.digest()
+        return {
+            HashType.SHA256.value: sha256_digest,
+            HashType.HASH256.value: sha256(sha256_digest),
+            HashType.RIPEMD160.value: self._ripemd160.digest(),
+            HashType.HASH160.value: ripemd160(sha256_digest)
+        }
+
+    def hexdigests(self) -> dict:
+        return {name: digest.hex() for name, digest in self.digests().items()}
+
+
+def hash_all(data: Data) -> dict:
+    """
+    Returns the hex digests of every HashType for the data, keyed by HashType value, in a single pass.
+    """
+    hasher = MultiHasher()
+    hasher.update(data.view)
+    return hasher.hexdigests()
+
+
+def hash_stream(stream, chunk_size: int = HASH_CHUNK_SIZE) -> MultiHasher:
+    """
+    Feeds a binary file-like object to a MultiHasher in chunks, so that the input is never held in memory at once,
+    and returns the hasher.
+    """
+    hasher = MultiHasher()
+    while chunk := stream.read(chunk_size):
+        hasher.update(chunk)
+    return hasher
+
+
+# --- Batch hashing --- #
+
+THREADED_HASH_MIN_SIZE = 2048  # hashlib releases the GIL for inputs of at least this many bytes
+THREADED_BATCH_MIN_BYTES = 1 << 20  # Below this many bytes in large items, threads cost more than they save
+HASH_THREADS = os.cpu_count() or 1
+
+_hash_pool = None
+_hash_pool_lock = threading.Lock()
+
+
+def _get_hash_pool() -> ThreadPoolExecutor:
+    global _hash_pool
+    if _hash_pool is None:
+        # Concurrent first calls (e.g. from asyncio.to_thread) must not each create a pool
+        with _hash_pool_lock:
+            if _hash_pool is None:
+                _hash_pool = ThreadPoolExecutor(max_workers=HASH_THREADS, thread_name_prefix="hash")
+    return _hash_pool
+
+
+def hash_many(items: list, hashtype: HashType) -> list:
+    """
+    Returns the digests as bytes of the given bytes-like objects or Data, in order.
+
+    Items of at least THREADED_HASH_MIN_SIZE bytes are hashed on a thread pool, as hashlib releases the GIL while
+    hashing them; they are split into one slice per thread with about equal numbers of bytes, so each thread makes
+    a single pass over its slice. Smaller items, or large items totalling less than THREADED_BATCH_MIN_BYTES, are
+    hashed inline.
+    """
+    hash_fn = get_hash(hashtype)
+    views = [item.view if isinstance(item, Data) else item for item in items]
+    large = [i for i, view in enumerate(views) if len(view) >= THREADED_HASH_MIN_SIZE]
+    large_bytes = sum(len(views[i]) for i in large)
+    if HASH_THREADS < 2 or len(large) < 2 or large_bytes < THREADED_BATCH_MIN_BYTES:
+        return [hash_fn(view) for view in views]
+
+    # Split the large items into slices of about large_bytes / HASH_THREADS bytes
+    slices, current, current_bytes = [], [], 0
+    target = large_bytes / HASH_THREADS
+    for i in large:
+        current.append(i)
+        current_bytes += len(views[i])
+        if current_bytes >= target:
+            slices.append(current)
+            current, current_bytes = [], 0
+    if current:
+        slices.append(current)
+
+    def hash_slice(indices):
+        return [hash_fn(views[i]) for i in indices]
+
+    futures = [_get_hash_pool().submit(hash_slice, indices) for indices in slices]
+
+    # Hash the small items while the threads run
+    results = [None] * len(views)
+    large_set = set(large)
+    for i, view in enumerate(views):
+        if i not in large_set:
+            results[i] = hash_fn(view)
+    for indices, future in zip(slices, futures):
+        for i, digest in zip(indices, future.result()):
+            results[i] = digest
+    return results
+
+
 # Testing
 if __name__ == "__main__":
     _data = Data("deadbeef")
@@ -0,0 +1,215 @@
+"""
+Jacobian point arithmetic on the curve y^2 = x^3 + ax + b over F_p, for a curve given only by (a, p).
+
+A point (X, Y, Z) in Jacobian coordinates corresponds to the affine point (X/Z^2, Y/Z^3). Addition and doubling in
+Jacobian coordinates require no modular inversion, so we use them for every chain of group operations and only return
+to affine coordinates once at the end. As with affine points, None denotes the point at infinity. Formulas are taken
+from the Explicit-Formulas Database:
+https://hyperelliptic.org/EFD/g1p/auto-shortw-jacobian.html
+
+The curve parameters come first, so that a curve can bind them once with functools.partial (see ecc.EllipticCurve).
+"""
+from src.library.ecc_math import batch_inverse
+
+
+# --- Coordinates --- #
+
+def to_jacobian(point: tuple):
+    """
+    Returns the affine point (x, y) as the Jacobian point (x, y, 1).
+    """
+    if point is None:
+        return None
+    x, y = point
+    return x, y, 1
+
+
+def to_affine(p: int, point: tuple):
+    """
+    Returns the Jacobian point (X, Y, Z) as the affine point (X/Z^2, Y/Z^3). Uses a single modular inversion.
+    """
+    if point is None:
+        return None
+    x, y, z = point
+    z_inv = pow(z, -1, p)
+    z_inv2 = (z_inv * z_inv) % p
+    return (x * z_inv2) % p, (y * z_inv2 * z_inv) % p
+
+
+def normalize_points(p: int, points: list) -> list:
+    """
+    Returns the Jacobian points as affine points, sharing a single modular inversion between all of them (see
+    ecc_math.batch_inverse). Points at infinity are returned as None.
+    """
+    finite = [point for point in points if point is not None]
+    z_invs = iter(batch_inverse([z for _, _, z in finite], p))
+
+    affine = []
+    for point in points:
+        if point is None:
+            affine.append(None)
+            continue
+        x, y, _ = point
+        z_inv = next(z_invs)
+        z_inv2 = (z_inv * z_inv) % p
+        affine.append(((x * z_inv2) % p, (y * z_inv2 * z_inv) % p))
+    return affine
+
+
+def negate_point(p: int, point: tuple):
+    """
+    Returns the inverse -P = (x, -y) of the affine point P = (x, y).
+    """
+    if point is None:
+        return None
+    x, y = point
+    return x, -y % p
+
+
+# --- Doubling --- #
+
+def doubling_formula(a: int, p: int):
+    """
+    Returns the doubling formula specialised to the curve coefficient a.
+    """
+    if a % p == 0:
+        return double_a0
+    if a % p == p - 3:
+        return double_a3
+    return double_generic
+
+
+def double_a0(a: int, p: int, point: tuple):
+    """
+    Jacobian doubling for a = 0 (secp*k1 curves). See dbl-2009-l.
+    """
+    if point is None:
+        return None
+    x, y, z = point
+    if y == 0:
+        return None
+    xx = (x * x) % p
+    yy = (y * y) % p
+    yyyy = (yy * yy) % p
+    d = (2 * ((x + yy) * (x + yy) - xx - yyyy)) % p
+    e = 3 * xx
+    x3 = (e * e - 2 * d) % p
+    y3 = (e * (d - x3) - 8 * yyyy) % p
+    z3 = (2 * y * z) % p
+    return x3, y3, z3
+
+
+def double_a3(a: int, p: int, point: tuple):
+    """
+    Jacobian doubling for a = -3 (secp*r1 curves). See dbl-2001-b.
+    """
+    if point is None:
+        return None
+    x, y, z = point
+    if y == 0:
+        return None
+    delta = (z * z) % p
+    gamma = (y * y) % p
+    beta = (x * gamma) % p
+    alpha = (3 * (x - delta) * (x + delta)) % p
+    x3 = (alpha * alpha - 8 * beta) % p
+    z3 = ((y + z) * (y + z) - gamma - delta) % p
+    y3 = (alpha * (4 * beta - x3) - 8 * gamma * gamma) % p
+    return x3, y3, z3
+
+
+def double_generic(a: int, p: int, point: tuple):
+    """
+    Jacobian doubling for arbitrary a. See dbl-2007-bl.
+    """
+    if point is None:
+        return None
+    x, y, z = point
+    if y == 0:
+        return None
+    xx = (x * x) % p
+    yy = (y * y) % p
+    yyyy = (yy * yy) % p
+    zz = (z * z) % p
+    s = (2 * ((x + yy) * (x + yy) - xx - yyyy)) % p
+    m = (3 * xx + a * zz * zz) % p
+    x3 = (m * m - 2 * s) % p
+    y3 = (m * (s - x3) - 8 * yyyy) % p
+    z3 = ((y + z) * (y + z) - yy - zz) % p
+    return x3, y3, z3
+
+
+# --- Addition --- #
+
+def add_affine(a: int, p: int, point1: tuple, point2: tuple):
+    """
+    Mixed addition of a Jacobian point1 and an affine point2, returning a Jacobian point.
+    """
+    if point2 is None:
+        return point1
+    if point1 is None:
+        return to_jacobian(point2)
+
+    x1, y1, z1 = point1
+    x2, y2 = point2
+    z1z1 = (z1 * z1) % p
+    h = (x2 * z1z1 - x1) % p
+    r = (y2 * z1 * z1z1 - y1) % p
+
+    # Handle equal x-coordinates
+    if h == 0:
+        return doubling_formula(a, p)(a, p, point1) if r == 0 else None
+
+    hh = (h * h) % p
+    hhh = (h * hh) % p
+    v = (x1 * hh) % p
+    x3 = (r * r - hhh - 2 * v) % p
+    y3 = (r * (v - x3) - y1 * hhh) % p
+    z3 = (z1 * h) % p
+    return x3, y3, z3
+
+
+def add(a: int, p: int, point1: tuple, point2: tuple):
+    """
+    Addition of two Jacobian points, returning a Jacobian point.
+    """
+    if point2 is None:
+        return point1
+    if point1 is None:
+        return point2
+
+    x1, y1, z1 = point1
+    x2, y2, z2 = point2
+    z1z1 = (z1 * z1) % p
+    z2z2 = (z2 * z2) % p
+    u1 = (x1 * z2z2) % p
+    s1 = (y1 * z2 * z2z2) % p
+    h = (x2 * z1z1 - u1) % p
+    r = (y2 * z1 * z1z1 - s1) % p
+
+    # Handle equal x-coordinates
+    if h == 0:
+        return doubling_formula(a, p)(a, p, point1) if r == 0 else None
+
+    hh = (h * h) % p
+    hhh = (h * hh) % p
+    v = (u1 * hh) % p
+    x3 = (r * r - hhh - 2 * v) % p
+    y3 = (r * (v - x3) - s1 * hhh) % p
+    z3 = (z1 * z2 * h) % p
+    return x3, y3, z3
+
+
+def multiply(a: int, p: int, n: int, point: tuple):
+    """
+    Returns n * P in Jacobian coordinates for n >= 0 and an affine point P, by double and add.
+    """
+    if point is None:
+        return None
+    double = doubling_formula(a, p)
+    result = None
+    for i in range(n.bit_length() - 1, -1, -1):
+        result = double(a, p, result)
+        if (n >> i) & 1:
+            result = add_affine(a, p, result, point)
+    return result
@@ -0,0 +1,141 @@
+"""
+Cache of decompressed public keys and their precomputed multiples.
+
+Verifying against a compressed public key first decompresses it, which costs a modular square root, and then
+multiplies the key, which starts by computing its odd multiples. A PublicKeyCache keeps both for recently used keys.
+Keys that are used often are promoted to a fixed-base table, with which verification needs no doublings. A
+fixed-base table for secp256k1 takes about 250 KB, so only the most recently used promoted keys keep theirs.
+"""
+import threading
+from collections import OrderedDict
+
+from src.library.codec import decompress_public_key
+from src.library.curves import CurveType, get_curve
+from src.library.ecc import EllipticCurve, PointTable
+
+KEY_CACHE_SIZE = 1024  # Default number of public keys held by a cache
+PROMOTION_THRESHOLD = 16  # Number of hits after which a key gets a fixed-base table
+KEY_TABLE_WINDOW = 6  # Window width of the fixed-base table of a promoted key
+MAX_PROMOTED_KEYS = 32  # Default number of keys holding a fixed-base table at once, about 8 MB for secp256k1
+
+
+class PublicKeyCache:
+
+    def __init__(self, curve_type: CurveType | EllipticCurve = CurveType.SECP256K1, size: int = KEY_CACHE_SIZE,
+                 promotion_threshold: int = PROMOTION_THRESHOLD, window: int = KEY_TABLE_WINDOW,
+                 max_promoted: int = MAX_PROMOTED_KEYS):
+        """
+        We hold up to size public keys for the given curve, evicting the least recently used key when full.
+
+        Each key is stored with a PointTable of its odd multiples. Once a key has been looked up promotion_threshold
+        times, its table is extended with a fixed-base table for the given window, which costs a few milliseconds and
+        about (bits/w) * 2^(w-1) points of memory. A promotion_threshold of 0 disables promotion. At most max_promoted
+        keys hold a fixed-base table; promoting another key demotes the least recently used promoted key, which keeps
+        its odd multiples and can be promoted again after another promotion_threshold lookups.
+        """
+        if size < 1:
+            raise ValueError("Public key cache size must be positive")
+        if max_promoted < 0:
+            raise ValueError("Maximum number of promoted keys must not be negative")
+        self.curve = get_curve(curve_type)
+        self.size = size
+        self.promotion_threshold = promotion_threshold
+        self.window = window
+        self.max_promoted = max_promoted
+
+        # Counters
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.promotions = 0
+        self.demotions = 0
+
+        self._entries = OrderedDict()  # cpk -> [point, table, hits]
+        self._promoted = OrderedDict()  # cpk -> entry, for the keys holding a fixed-base table, least recent first
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, cpk: str):
+        return self._normalize(cpk) in self._entries
+
+    def get(self, cpk: str) -> tuple:
+        """
+        Returns the public key point and its PointTable for the compressed public key. Raises a ValueError if the
+        key cannot be decompressed; invalid keys are not cached.
+        """
+        cpk = self._normalize(cpk)
+        with self._lock:
+            entry = self._entries.get(cpk)
+            if entry is not None:
+                self._entries.move_to_end(cpk)
+                if cpk in self._promoted:
+                    self._promoted.move_to_end(cpk)
+                self.hits += 1
+                entry[2] += 1
+                promote = self.promotion_threshold and entry[2] == self.promotion_threshold
+                if not promote:
+                    return entry[0], entry[1]
+            else:
+                self.misses += 1
+
+        if entry is None:
+            # Decompress and build the odd multiples outside the lock
+            point = decompress_public_key(cpk, self.curve)
+            table = self.curve.precompute_point(point)
+            with self._lock:
+                self._entries[cpk] = [point, table, 0]
+                self._entries.move_to_end(cpk)
+                while len(self._entries) > self.size:
+                    evicted, _ = self._entries.popitem(last=False)
+                    self._promoted.pop(evicted, None)
+                    self.evictions += 1
+            return point, table
+
+        # Promote the key to a fixed-base table; only the lookup that crossed the threshold builds it
+        point = entry[0]
+        table = self.curve.precompute_point(point, self.window)
+        with self._lock:
+            entry[1] = table
+            self.promotions += 1
+            if self._entries.get(cpk) is entry:
+                self._promoted[cpk] = entry
+            while len(self._promoted) > self.max_promoted:
+                self._demote(self._promoted.popitem(last=False)[1])
+        return point, table
+
+    def _demote(self, entry: list):
+        """
+        Drops the fixed-base table of a promoted entry, keeping its odd multiples, and restarts its hit count.
+        """
+        table = entry[1]
+        entry[1] = PointTable(table.point, table.wnaf_width, table.wnaf_tables)
+        entry[2] = 0
+        self.demotions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._promoted.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'size': len(self._entries),
+                'capacity': self.size,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+                'evictions': self.evictions,
+                'promoted': len(self._promoted),
+                'max_promoted': self.max_promoted,
+                'promotions': self.promotions,
+                'demotions': self.demotions
+            }
+
+    @staticmethod
+    def _normalize(cpk: str) -> str:
+        cpk = cpk.lower()
+        return cpk[2:] if cpk.startswith("0x") else cpk
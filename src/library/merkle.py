@@ -0,0 +1,206 @@
+"""
+Bitcoin Merkle roots and inclusion proofs.
+
+The leaves are txids in internal byte order. Each level of the tree hashes pairs of nodes with hash256; a level with
+an odd number of nodes duplicates its last node. The tree is built like a binary counter: we keep one pending subtree
+root per level (the frontier), and a new leaf is combined with the pending roots until it reaches an empty level. A
+tree of n leaves is therefore held in O(log n) memory, appending a leaf costs O(log n) hashes at most, and the root
+is computed from the frontier in O(log n) hashes without changing the tree.
+
+Txids are shown in reverse byte order (display order); see the txid helpers at the end.
+"""
+from itertools import islice
+from typing import Iterable
+
+from src.library.hash_functions import hash256
+
+CHUNK_LEVEL = 10  # Leaves are read in chunks of 2^CHUNK_LEVEL, each hashed level by level into one subtree root
+CHUNK_SIZE = 1 << CHUNK_LEVEL
+
+
+class MerkleTree:
+    """
+    An append-only Merkle tree holding only its frontier. With track, the tree also keeps the inclusion proof of the
+    leaf at that index as it is built.
+    """
+
+    def __init__(self, leaves: Iterable[bytes] = (), track: int | None = None):
+        self._frontier = []  # _frontier[i] is the root of a complete subtree of 2^i leaves, or None
+        self._size = 0
+        self.track = track
+        self._path = []  # Siblings of the tracked leaf's ancestors that have been paired, from the bottom
+        self.extend(leaves)
+
+    def __len__(self):
+        return self._size
+
+    def append(self, leaf: bytes):
+        self._push(leaf, 0)
+
+    def extend(self, leaves: Iterable[bytes]):
+        """
+        Appends the leaves of an iterable, which is read in chunks of CHUNK_SIZE leaves.
+        """
+        leaves = iter(leaves)
+        while chunk := list(islice(leaves, CHUNK_SIZE)):
+            start = self._size
+            tracked = self.track is not None and start <= self.track < start + len(chunk)
+            if len(chunk) < CHUNK_SIZE or start % CHUNK_SIZE or tracked:
+                for leaf in chunk:
+                    self._push(leaf, 0)
+            else:
+                # A full, aligned chunk is a complete subtree: hash it level by level
+                level = chunk
+                while len(level) > 1:
+                    level = [hash256(level[i] + level[i + 1]) for i in range(0, len(level), 2)]
+                self._push(level[0], CHUNK_LEVEL)
+
+    def root(self) -> bytes:
+        """
+        Returns the Merkle root of the leaves appended so far. Raises a ValueError for an empty tree.
+        """
+        return self._finish()[0]
+
+    def proof(self) -> list:
+        """
+        Returns the inclusion proof of the tracked leaf: the sibling at each level from the bottom. Raises a
+        ValueError if no leaf is tracked or the tracked leaf has not been appended yet.
+        """
+        if self.track is None or not 0 <= self.track < self._size:
+            raise ValueError("The tree has no tracked leaf to prove.")
+        return self._finish()[1]
+
+    def _push(self, node: bytes, level: int):
+        """
+        Adds the root of a complete subtree of 2^level leaves and carries it up through the pending roots.
+        """
+        frontier = self._frontier
+        position = self._size >> level
+        self._size += 1 << level
+        while level < len(frontier) and frontier[level] is not None:
+            left = frontier[level]
+            frontier[level] = None
+            if self.track is not None:
+                ancestor = self.track >> level
+                if ancestor == position:
+                    self._path.append(left)
+                elif ancestor == position - 1:
+                    self._path.append(node)
+            node = hash256(left + node)
+            level += 1
+            position >>= 1
+        if level >= len(frontier):
+            frontier.extend([None] * (level + 1 - len(frontier)))
+        frontier[level] = node
+
+    def _finish(self) -> tuple:
+        """
+        Returns the root and the proof of the tracked leaf, pairing the pending roots from the bottom. The node
+        carried up from below covers the last leaves; a node without a sibling is paired with itself.
+        """
+        if not self._size:
+            raise ValueError("The Merkle root of no leaves is undefined.")
+        frontier = self._frontier
+        top = len(frontier) - 1
+        path = list(self._path)
+        carry = None
+        for level, pending in enumerate(frontier):
+            if carry is None and pending is None:
+                continue
+            if carry is None and level == top:
+                return pending, path
+
+            # Pair the pending root and the carried node, duplicating whichever is alone
+            left = carry if pending is None else pending
+            right = left if carry is None or pending is None else carry
+            if self.track is not None and level >= len(path):
+                ancestor = self.track >> level
+                carry_position = -(-self._size >> level) - 1
+                path.append(right if pending is None or ancestor != carry_position else left)
+            carry = hash256(left + right)
+        return carry, path
+
+
+def merkle_root(leaves: Iterable[bytes]) -> bytes:
+    """
+    Returns the Merkle root of the leaves, read from an iterable so that they need not be held in memory at once.
+    """
+    return MerkleTree(leaves).root()
+
+
+def merkle_proof(leaves: Iterable[bytes], index: int) -> tuple:
+    """
+    Returns the Merkle root and the inclusion proof of the leaf at the index. Raises a ValueError if the index is out
+    of range.
+    """
+    if index < 0:
+        raise ValueError("The leaf index must not be negative.")
+    tree = MerkleTree(leaves, track=index)
+    return tree.root(), tree.proof()
+
+
+def verify_proof(leaf: bytes, index: int, proof: list, root: bytes) -> bool:
+    """
+    Returns True if the proof shows that the leaf is at the index in the tree with the given root.
+
+    Algorithm:
+    ---------
+        1) Start with node = leaf
+        2) For each sibling, node = hash256(sibling || node) if the index is odd, otherwise hash256(node || sibling);
+            then halve the index
+        3) The leaf is included if node equals the root and the index is 0
+    """
+    node = leaf
+    for sibling in proof:
+        node = hash256(sibling + node) if index & 1 else hash256(node + sibling)
+        index >>= 1
+    return index == 0 and node == root
+
+
+# --- Txid display order --- #
+
+def txid_from_hex(txid: str) -> bytes:
+    """
+    Returns the internal byte order of a 32-byte txid or hash given as hex in display order. Raises a ValueError if
+    it is not 32 bytes of hex.
+    """
+    try:
+        data = bytes.fromhex(txid.removeprefix("0x"))
+    except (AttributeError, TypeError, ValueError):
+        raise ValueError(f"Invalid txid {txid!r}.")
+    if len(data) != 32:
+        raise ValueError(f"A txid is 32 bytes, {txid!r} is {len(data)}.")
+    return data[::-1]
+
+
+def txid_to_hex(txid: bytes) -> str:
+    """
+    Returns a 32-byte txid or hash in internal byte order as hex in display order.
+    """
+    return txid[::-1].hex()
+
+
+if __name__ == "__main__":
+    # Compare the streaming root with a root computed level by level
+    import os
+    import time
+
+    def reference_root(leaves: list) -> bytes:
+        level = list(leaves)
+        while len(level) > 1:
+            if len(level) % 2:
+                level.append(level[-1])
+            level = [hash256(level[i] + level[i + 1]) for i in range(0, len(level), 2)]
+        return level[0]
+
+    for n in (1, 2, 3, 5, 7, 1023, 1025, 3000):
+        _leaves = [os.urandom(32) for _ in range(n)]
+        assert merkle_root(_leaves) == reference_root(_leaves)
+        for i in {0, n // 2, n - 1}:
+            _root, _proof = merkle_proof(_leaves, i)
+            assert verify_proof(_leaves[i], i, _proof, _root)
+
+    n = 1_000_000
+    start = time.perf_counter()
+    _root = merkle_root(os.urandom(32) for _ in range(n))
+    print(f"Root of {n} streamed leaves: {txid_to_hex(_root)} in {time.perf_counter() - start:.2f}s")
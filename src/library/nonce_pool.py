@@ -0,0 +1,171 @@
+"""
+Precomputed signing nonces.
+
+An ECDSA signature needs a fresh nonce k together with r = (k * G).x mod n and k^(-1) mod n, which costs a scalar
+multiplication and an inversion. None of this depends on the message or the private key, so a NoncePool computes
+the tuples ahead of time in a background thread, in batches sharing a single normalisation and a single inversion.
+The online part of signing is then s = k^(-1) * (z + r * d) mod n.
+
+A forked child starts with a copy of the parent's memory, so its pools would hand out the same nonces as the parent's,
+and two signatures with the same k give away the private key. Every pool therefore discards its nonces in a forked
+child and restarts its filler there.
+"""
+import os
+import secrets
+import threading
+import time
+import weakref
+from collections import deque
+
+from src.library.curves import CurveType, get_curve
+from src.library.ecc import EllipticCurve
+from src.library.ecc_math import batch_inverse
+
+NONCE_POOL_SIZE = 256  # Default number of nonces held by a pool
+NONCE_BATCH_SIZE = 16  # Nonces computed per batch; small batches keep the filler from holding the GIL for long
+
+# Every pool of this process, so that they can be reset in a forked child
+_POOLS = weakref.WeakSet()
+
+
+class NoncePool:
+
+    def __init__(self, curve_type: CurveType | EllipticCurve = CurveType.SECP256K1, size: int = NONCE_POOL_SIZE,
+                 batch_size: int = NONCE_BATCH_SIZE):
+        """
+        We hold up to size tuples (k, r, k^(-1), recovery_id) for the given curve. The pool is refilled in the
+        background once it falls below half full; call start to run the filler thread.
+
+        Each nonce is handed out by take exactly once and the pool keeps no other reference to it. Python integers
+        are immutable, so a used nonce cannot be overwritten in place; it is released as soon as the signature is
+        computed, and stop clears any nonces still in the pool.
+        """
+        if size < 1 or batch_size < 1:
+            raise ValueError("Nonce pool size and batch size must be positive")
+        self.curve = get_curve(curve_type)
+        self.size = size
+        self.batch_size = batch_size
+
+        # Counters
+        self.taken = 0
+        self.misses = 0
+
+        self._nonces = deque()
+        self._wanted = threading.Event()
+        self._stopped = threading.Event()
+        self._thread = None
+        self._start_lock = threading.Lock()
+        _POOLS.add(self)
+
+    def __len__(self):
+        return len(self._nonces)
+
+    def start(self):
+        """
+        Starts the background thread that keeps the pool filled, unless it is already running.
+        """
+        if self._thread is not None:
+            return
+        with self._start_lock:
+            if self._thread is not None:
+                return
+            self._stopped.clear()
+            self._wanted.set()
+            self._thread = threading.Thread(target=self._fill, name="nonce-pool", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        """
+        Stops the filler thread and discards every nonce left in the pool.
+        """
+        self._stopped.set()
+        self._wanted.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        self.clear()
+
+    def clear(self):
+        self._nonces.clear()
+
+    def _after_fork(self):
+        """
+        Discards the nonces copied from the parent process and restarts the filler if the parent's was running. The
+        filler thread does not exist in the child, and its events may have been copied mid-update, so they are
+        replaced.
+        """
+        was_running = self._thread is not None
+        self._nonces = deque()
+        self._wanted = threading.Event()
+        self._stopped = threading.Event()
+        self._thread = None
+        self._start_lock = threading.Lock()
+        if was_running:
+            self.start()
+
+    def take(self) -> tuple:
+        """
+        Removes and returns a tuple (k, r, k_inv, recovery_id). If the pool is empty, a nonce is computed inline
+        and counted as a miss.
+        """
+        try:
+            nonce = self._nonces.popleft()
+        except IndexError:
+            nonce = None
+
+        # Wake the filler once we are below half full
+        if len(self._nonces) < self.size // 2 + 1:
+            self._wanted.set()
+
+        if nonce is None:
+            self.misses += 1
+            nonce = self._compute_one()
+        self.taken += 1
+        return nonce
+
+    def generate_nonces(self, count: int) -> list:
+        """
+        Returns up to count new tuples (k, r, k_inv, recovery_id).
+
+        Algorithm:
+        ---------
+            1) Select count random k in [1, n-1]
+            2) Compute the points k * G together, normalised with a single inversion
+            3) Compute every k^(-1) mod n with a single inversion
+            4) Let r = x mod n and recovery_id = (y mod 2) + 2 * (1 if x >= n else 0), discarding the rare k with r = 0
+        """
+        n = self.curve.order
+        scalars = [secrets.randbelow(n - 1) + 1 for _ in range(count)]
+        points = self.curve.multiply_generator_batch(scalars)
+        inverses = batch_inverse(scalars, n)
+
+        nonces = []
+        for k, k_inv, (x, y) in zip(scalars, inverses, points):
+            r = x % n
+            if r == 0:
+                continue
+            nonces.append((k, r, k_inv, (y & 1) | (2 if x >= n else 0)))
+        return nonces
+
+    def _compute_one(self) -> tuple:
+        nonces = []
+        while not nonces:
+            nonces = self.generate_nonces(1)
+        return nonces[0]
+
+    def _fill(self):
+        while not self._stopped.is_set():
+            self._wanted.wait()
+            self._wanted.clear()
+            while not self._stopped.is_set() and len(self._nonces) < self.size:
+                count = min(self.batch_size, self.size - len(self._nonces))
+                self._nonces.extend(self.generate_nonces(count))
+                time.sleep(0)  # Yield to the signing threads between batches
+
+
+def _reset_pools_after_fork():
+    for pool in list(_POOLS):
+        pool._after_fork()
+
+
+os.register_at_fork(after_in_child=_reset_pools_after_fork)
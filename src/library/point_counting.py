@@ -0,0 +1,366 @@
+"""
+Point counting: the order of the group E(F_p) of the curve y^2 = x^3 + ax + b over F_p.
+
+By Hasse's theorem #E(F_p) = p + 1 - t with |t| <= 2 sqrt(p). We determine t as follows:
+
+    - For p < MAX_PRIME, by enumeration: t = -sum of the Legendre symbols of x^3 + ax + b over all x.
+    - Otherwise, with Schoof's algorithm: for small primes l we compute t mod l from the action of the Frobenius
+      endomorphism on the l-torsion, and combine the residues with the CRT. The primes are chosen by a cost model:
+      once the product L of the primes is large enough, the remaining candidates N = p + 1 - t, with t fixed mod L,
+      are searched with baby-step giant-step (BSGS) for the multiples N of a random point. Candidates that remain
+      ambiguous are separated with points on the quadratic twist, which has order 2p + 2 - N (Mestre).
+
+For medium sized p the cost model uses few or no Schoof primes, so the search is a plain BSGS on the Hasse interval.
+Results are cached by curve parameters.
+"""
+import math
+import secrets
+from functools import lru_cache
+
+from src.library import jacobian, polynomial as poly
+from src.library.ecc_math import MAX_PRIME, is_prime, jacobi_symbol, square_root_context
+
+ENUMERATION_MAX_PRIME = MAX_PRIME  # Largest prime counted by enumeration
+POINT_COUNTING_MAX_BITS = 128  # Largest prime counted on demand; counting takes tens of seconds at 128 bits
+BSGS_MAX_MATCHES = 64  # A point with more matching multiples in the search interval has too small an order
+BSGS_CHUNK_SIZE = 1024  # Giant steps normalised together
+MAX_ATTEMPTS = 32  # Random points tried before giving up
+
+# Cost model, fitted to timings of this module: a BSGS step takes about BSGS_STEP_COST seconds, and the computation
+# modulo l takes about SCHOOF_COST * bits^2 * d^1.5 seconds, where d = (l^2 - 1) / 2 is the degree of psi_l
+BSGS_STEP_COST = 1e-5
+SCHOOF_COST = 1e-7
+
+
+# --- API --- #
+
+def count_points(a: int, b: int, p: int) -> int:
+    """
+    Returns the number of points of E(F_p), including the point at infinity, for the curve y^2 = x^3 + ax + b over
+    the prime field F_p with p > 3. Raises a ValueError if p is not such a prime or the curve is singular.
+    """
+    if p <= 3 or not is_prime(p):
+        raise ValueError(f"{p} is not a prime greater than 3")
+    a, b = a % p, b % p
+    if (4 * pow(a, 3, p) + 27 * pow(b, 2, p)) % p == 0:
+        raise ValueError("Curve is singular: 4a^3 + 27b^2 = 0 (mod p)")
+    return _count_points(a, b, p)
+
+
+@lru_cache(maxsize=256)
+def _count_points(a: int, b: int, p: int) -> int:
+    if p < ENUMERATION_MAX_PRIME:
+        return count_points_by_enumeration(a, b, p)
+
+    # Choose the Schoof primes and combine the traces
+    residue, modulus = 0, 1
+    division_polynomials = None
+    for l in schoof_primes(p):
+        if l == 2:
+            t = _trace_mod_2(a, b, p)
+        else:
+            division_polynomials = _division_polynomials(a, b, p, l + 2, division_polynomials)
+            t = _trace_mod_l(l, a, b, p, division_polynomials)
+        residue = _crt(residue, modulus, t, l)
+        modulus *= l
+
+    # The order N = p + 1 - t is then fixed modulo L
+    return _order_from_residue(a, b, p, (p + 1 - residue) % modulus, modulus)
+
+
+def count_points_by_enumeration(a: int, b: int, p: int) -> int:
+    """
+    Returns #E(F_p) = p + 1 + sum over x in F_p of the Legendre symbol of x^3 + ax + b, with the quadratic residues
+    taken from a table of squares.
+    """
+    squares = bytearray(p)
+    for y in range(1, (p + 1) // 2):
+        squares[(y * y) % p] = 1
+
+    total = p + 1
+    for x in range(p):
+        rhs = ((x * x + a) * x + b) % p
+        if rhs:
+            total += 1 if squares[rhs] else -1
+    return total
+
+
+def schoof_primes(p: int) -> list:
+    """
+    Returns the primes l for which Schoof's algorithm computes t mod l. Primes are added while the time saved in the
+    BSGS search is larger than the estimated cost of the prime, and until their product exceeds the width 4 sqrt(p)
+    of the Hasse interval.
+    """
+    width = 4 * math.isqrt(p) + 4
+    bits = p.bit_length()
+    primes, modulus = [], 1
+    l = 2
+    while modulus <= width:
+        if l == 2:
+            cost = 0
+        else:
+            d = (l * l - 1) // 2
+            cost = SCHOOF_COST * bits * bits * d ** 1.5
+        saving = BSGS_STEP_COST * 2 * (math.isqrt(width // modulus) - math.isqrt(width // (modulus * l)))
+        if cost > saving:
+            break
+        primes.append(l)
+        modulus *= l
+        l = next(k for k in range(l + 1, 2 * l + 2) if is_prime(k))
+    return primes
+
+
+# --- Schoof --- #
+
+def _trace_mod_2(a: int, b: int, p: int) -> int:
+    """
+    The group has a point of order 2 iff x^3 + ax + b has a root in F_p, i.e. iff gcd(x^p - x, x^3 + ax + b) != 1.
+    As p + 1 is even, t is then even.
+    """
+    curve_poly = poly.trim([b, a, 0, 1])
+    frobenius = poly.Modulus(curve_poly, p).pow([0, 1], p)
+    return 0 if len(poly.gcd(poly.sub(frobenius, [0, 1], p), curve_poly, p)) > 1 else 1
+
+
+def _division_polynomials(a: int, b: int, p: int, n: int, known: list | None = None) -> list:
+    """
+    Returns the list of polynomials f_0, ..., f_n, where f_k = psi_k for odd k and f_k = psi_k / (2y) for even k,
+    so that all f_k lie in F_p[x]. The list known of earlier polynomials is extended if given.
+
+    With F = x^3 + ax + b, so that y^2 = F, the recurrences for the division polynomials psi_k become
+        f_(2m+1) = 16 F^2 f_(m+2) f_m^3 - f_(m-1) f_(m+1)^3     (m even)
+        f_(2m+1) = f_(m+2) f_m^3 - 16 F^2 f_(m-1) f_(m+1)^3     (m odd)
+        f_(2m)   = f_m (f_(m+2) f_(m-1)^2 - f_(m-2) f_(m+1)^2)
+    """
+    f = known or [
+        [],
+        [1],
+        [1],
+        poly.trim([(-a * a) % p, (12 * b) % p, (6 * a) % p, 0, 3]),
+        poly.trim([(-16 * b * b - 2 * a * a * a) % p, (-8 * a * b) % p, (-10 * a * a) % p, (40 * b) % p,
+                   (10 * a) % p, 0, 2])
+    ]
+    curve_poly = poly.trim([b, a, 0, 1])
+    curve_sq16 = poly.scale(poly.sqr(curve_poly, p), 16, p)
+    mul, sqr = poly.mul, poly.sqr
+    for k in range(len(f), n + 1):
+        m = k // 2
+        if k % 2:
+            first = mul(f[m + 2], mul(sqr(f[m], p), f[m], p), p)
+            second = mul(f[m - 1], mul(sqr(f[m + 1], p), f[m + 1], p), p)
+            if m % 2:
+                second = mul(curve_sq16, second, p)
+            else:
+                first = mul(curve_sq16, first, p)
+            f.append(poly.sub(first, second, p))
+        else:
+            bracket = poly.sub(mul(f[m + 2], sqr(f[m - 1], p), p), mul(f[m - 2], sqr(f[m + 1], p), p), p)
+            f.append(mul(f[m], bracket, p))
+    return f
+
+
+def _multiple_fractions(n: int, f: list, curve_poly: list, modulus: poly.Modulus) -> tuple:
+    """
+    Returns (x_num, x_den, y_num, y_den) modulo the modulus, such that [n](x, y) = (x - x_num / x_den,
+    y * y_num / y_den), for 1 <= n with f_(n+2) in f.
+    """
+    p = modulus.p
+
+    def f_mod(k):
+        return [p - 1] if k == -1 else poly.divmod_poly(f[k], modulus.m, p)[1]
+
+    fm2, fm1, f0, fp1, fp2 = (f_mod(k) for k in range(n - 2, n + 3))
+    f0_sq = modulus.sqr(f0)
+    y_num = poly.sub(modulus.mul(fp2, modulus.sqr(fm1)), modulus.mul(fm2, modulus.sqr(fp1)), p)
+    if n % 2:
+        x_num = modulus.mul(poly.scale(curve_poly, 4, p), modulus.mul(fm1, fp1))
+        x_den = f0_sq
+        y_den = modulus.mul(f0_sq, f0)
+    else:
+        x_num = modulus.mul(fm1, fp1)
+        x_den = modulus.mul(poly.scale(curve_poly, 4, p), f0_sq)
+        y_den = modulus.mul(poly.scale(modulus.sqr(curve_poly), 16, p), modulus.mul(f0_sq, f0))
+    return x_num, x_den, y_num, y_den
+
+
+def _trace_mod_l(l: int, a: int, b: int, p: int, f: list) -> int:
+    """
+    Returns t mod l for an odd prime l != p.
+
+    Algorithm:
+    ---------
+    Work in R = F_p[x] / (psi_l), where a point of E[l] is written (X(x), y * Y(x)) with y^2 = F = x^3 + ax + b.
+    The Frobenius map satisfies pi^2 - t pi + q = 0 on E[l], where q = p mod l.
+        1) Compute pi(P) = (x^p, y F^((p-1)/2)), pi^2(P) and [q]P.
+        2) If pi^2(P) = +-[q]P for some P in E[l] (a non-trivial gcd with psi_l), then either t = 0 mod l, or q = w^2
+           mod l and t = +-2w, the sign being that of pi(P) = +-[w]P.
+        3) Otherwise compute pi^2(P) + [q]P and find tau in [1, (l-1)/2] with [tau]pi(P) = +-(pi^2(P) + [q]P),
+           comparing x-coordinates and then y-coordinates. Then t = +-tau mod l.
+    """
+    modulus = poly.Modulus(f[l], p)
+    curve_poly = poly.trim([b, a, 0, 1])
+    mul, sqr, sub = modulus.mul, modulus.sqr, poly.sub
+
+    # 1) Frobenius and its square
+    x_p = modulus.pow([0, 1], p)
+    y_p = modulus.pow(curve_poly, (p - 1) // 2)
+    x_p2 = modulus.pow(x_p, p)
+    y_p2 = mul(modulus.pow(y_p, p), y_p)
+
+    q = p % l
+    x_num, x_den, y_num, y_den = _multiple_fractions(q, f, curve_poly, modulus)
+    x_q = sub([0, 1], mul(x_num, modulus.inverse(x_den)), p)
+    y_q = mul(y_num, modulus.inverse(y_den))
+
+    # 2) Special case
+    if len(poly.gcd(sub(x_p2, x_q, p), modulus.m, p)) > 1:
+        w = next((w for w in range(1, l) if (w * w) % l == q), None)
+        if w is None:
+            return 0
+        x_num, x_den, y_num, y_den = _multiple_fractions(w, f, curve_poly, modulus)
+        x_diff = poly.add(mul(sub(x_p, [0, 1], p), x_den), x_num, p)
+        if len(poly.gcd(x_diff, modulus.m, p)) == 1:
+            return 0
+        y_diff = sub(mul(y_p, y_den), y_num, p)
+        return (2 * w) % l if len(poly.gcd(y_diff, modulus.m, p)) > 1 else (-2 * w) % l
+
+    # 3) General case: (x3, y * y3) = pi^2(P) + [q]P, with slope y * lam
+    lam = mul(sub(y_p2, y_q, p), modulus.inverse(sub(x_p2, x_q, p)))
+    x3 = sub(sub(mul(sqr(lam), curve_poly), x_p2, p), x_q, p)
+    y3 = sub(mul(lam, sub(x_p2, x3, p)), y_p2, p)
+
+    # tau = 1
+    if x3 == x_p:
+        return 1 if y3 == y_p else l - 1
+
+    # tau = 2, doubling pi(P) with slope y * lam = (3 x_p^2 + a) / (2 y y_p) = y (3 x_p^2 + a) / (2 F y_p)
+    lam = mul(poly.add(poly.scale(sqr(x_p), 3, p), [a] if a else [], p),
+              modulus.inverse(mul(poly.scale(curve_poly, 2, p), y_p)))
+    x2 = sub(mul(sqr(lam), curve_poly), poly.scale(x_p, 2, p), p)
+    y2 = sub(mul(lam, sub(x_p, x2, p)), y_p, p)
+    if x3 == x2:
+        return 2 if y3 == y2 else l - 2
+
+    # tau >= 3, adding pi(P) in Jacobian coordinates (X, y * Y, Z) over R
+    x_j, y_j, z_j = x2, y2, [1]
+    for tau in range(3, (l - 1) // 2 + 1):
+        z_sq = sqr(z_j)
+        h = sub(mul(x_p, z_sq), x_j, p)
+        r = sub(mul(y_p, mul(z_j, z_sq)), y_j, p)
+        h_sq = sqr(h)
+        h_cu = mul(h, h_sq)
+        v = mul(x_j, h_sq)
+        x_j = sub(sub(mul(sqr(r), curve_poly), h_cu, p), poly.scale(v, 2, p), p)
+        y_j = sub(mul(r, sub(v, x_j, p)), mul(y_j, h_cu), p)
+        z_j = mul(z_j, h)
+
+        z_sq = sqr(z_j)
+        if mul(x3, z_sq) == x_j:
+            return tau if mul(y3, mul(z_sq, z_j)) == y_j else l - tau
+
+    raise ArithmeticError(f"No trace found modulo {l}")
+
+
+def _crt(r1: int, m1: int, r2: int, m2: int) -> int:
+    """Returns the residue modulo m1 * m2 congruent to r1 mod m1 and r2 mod m2, for coprime m1 and m2."""
+    return (r1 + m1 * ((r2 - r1) * pow(m1, -1, m2))) % (m1 * m2)
+
+
+# --- BSGS --- #
+
+def _order_from_residue(a: int, b: int, p: int, residue: int, modulus: int) -> int:
+    """
+    Returns the group order N, given N = residue mod modulus.
+
+    Algorithm:
+    ---------
+        1) List the candidates N = start + i * modulus in the Hasse interval [p + 1 - 2 sqrt(p), p + 1 + 2 sqrt(p)].
+        2) For a random point P, find the candidates with N * P = O by BSGS. If P has small order, try another point.
+        3) While several candidates remain, keep those with N * P = O for another random point P, and those with
+           (2p + 2 - N) * P' = O for a random point P' on the quadratic twist.
+    """
+    bound = math.isqrt(4 * p)
+    low = p + 1 - bound
+    start = low + (residue - low) % modulus
+    count = (p + 1 + bound - start) // modulus + 1
+    if count == 1:
+        return start
+
+    twist_a, twist_b = _quadratic_twist(a, b, p)
+    candidates = None
+    for _ in range(MAX_ATTEMPTS):
+        point = _random_point(a, b, p)
+        if candidates is None:
+            matches = _bsgs(point, a, p, start, modulus, count)
+            if matches is None:
+                continue
+            candidates = [start + i * modulus for i in matches]
+        else:
+            candidates = [n for n in candidates if jacobian.multiply(a, p, n, point) is None]
+
+        if len(candidates) > 1:
+            twist_point = _random_point(twist_a, twist_b, p)
+            candidates = [n for n in candidates if jacobian.multiply(twist_a, p, 2 * p + 2 - n, twist_point) is None]
+        if len(candidates) == 1:
+            return candidates[0]
+        if not candidates:
+            raise ArithmeticError("No group order found in the Hasse interval")
+
+    raise ArithmeticError("Group order could not be determined")
+
+
+def _bsgs(point: tuple, a: int, p: int, start: int, step: int, count: int) -> list | None:
+    """
+    Returns the indices 0 <= i < count with (start + i * step) * P = O, or None if there are more than
+    BSGS_MAX_MATCHES of them.
+
+    With S = step * P and m = ceil(sqrt(count)), write i = k * m + j with 0 <= j < m. Then the condition is
+        j * S = -(start * P) - k * (m * S),
+    so we store the baby steps j * S and look up the giant steps on the right.
+    """
+    m = math.isqrt(count - 1) + 1
+    step_point = jacobian.to_affine(p, jacobian.multiply(a, p, step, point))
+    if step_point is None:
+        return None
+
+    # Baby steps
+    babies = [None, jacobian.to_jacobian(step_point)]
+    for _ in range(m - 2):
+        babies.append(jacobian.add_affine(a, p, babies[-1], step_point))
+    baby_table = {}
+    for j, baby in enumerate(jacobian.normalize_points(p, babies)):
+        if j and baby is None:
+            return None  # S has order below m
+        baby_table[baby] = j
+
+    # Giant steps
+    giant_step = jacobian.negate_point(p, jacobian.to_affine(p, jacobian.multiply(a, p, m, step_point)))
+    giant = jacobian.multiply(a, p, start, jacobian.negate_point(p, point))
+    matches = []
+    for chunk_start in range(0, count // m + 1, BSGS_CHUNK_SIZE):
+        giants = []
+        for _ in range(min(BSGS_CHUNK_SIZE, count // m + 1 - chunk_start)):
+            giants.append(giant)
+            giant = jacobian.add_affine(a, p, giant, giant_step)
+        for k, affine in enumerate(jacobian.normalize_points(p, giants), start=chunk_start):
+            j = baby_table.get(affine)
+            if j is not None and k * m + j < count:
+                matches.append(k * m + j)
+                if len(matches) > BSGS_MAX_MATCHES:
+                    return None
+    return matches
+
+
+def _quadratic_twist(a: int, b: int, p: int) -> tuple:
+    """Returns (a d^2, b d^3) for a quadratic non-residue d, defining the quadratic twist of the curve."""
+    d = next(d for d in range(2, p) if jacobi_symbol(d, p) == -1)
+    return (a * d * d) % p, (b * d * d * d) % p
+
+
+def _random_point(a: int, b: int, p: int) -> tuple:
+    square_root = square_root_context(p)
+    while True:
+        x = secrets.randbelow(p)
+        y = square_root((x * x * x + a * x + b) % p)
+        if y is not None:
+            return x, y
@@ -0,0 +1,193 @@
+"""
+Polynomials over F_p, for point counting.
+
+A polynomial is a list of coefficients in [0, p), constant term first, with no trailing zeros; the zero polynomial
+is the empty list. Products use Kronecker substitution: both polynomials are packed into integers with one
+fixed-width slot per coefficient, multiplied with a single big-integer product and unpacked again, so the work is
+done by Python's integer multiplication instead of a loop over coefficient pairs.
+"""
+
+
+def trim(f: list) -> list:
+    while f and f[-1] == 0:
+        f.pop()
+    return f
+
+
+def degree(f: list) -> int:
+    """Returns the degree of f, with -1 for the zero polynomial."""
+    return len(f) - 1
+
+
+def add(f: list, g: list, p: int) -> list:
+    if len(f) < len(g):
+        f, g = g, f
+    result = f[:]
+    for i, c in enumerate(g):
+        result[i] = (result[i] + c) % p
+    return trim(result)
+
+
+def sub(f: list, g: list, p: int) -> list:
+    result = f + [0] * (len(g) - len(f))
+    for i, c in enumerate(g):
+        result[i] = (result[i] - c) % p
+    return trim(result)
+
+
+def scale(f: list, c: int, p: int) -> list:
+    c %= p
+    return trim([(c * coeff) % p for coeff in f]) if c else []
+
+
+def _slot_bytes(p: int, terms: int) -> int:
+    """Returns the slot width in bytes, large enough for a sum of terms products of two coefficients."""
+    return (2 * p.bit_length() + terms.bit_length() + 7) // 8
+
+
+def _pack(f: list, width: int) -> int:
+    return int.from_bytes(b"".join(c.to_bytes(width, "little") for c in f), "little")
+
+
+def _unpack(n: int, length: int, width: int, p: int) -> list:
+    data = n.to_bytes(length * width, "little")
+    return trim([int.from_bytes(data[i:i + width], "little") % p for i in range(0, length * width, width)])
+
+
+def mul(f: list, g: list, p: int) -> list:
+    """
+    Returns f * g using Kronecker substitution.
+    """
+    if not f or not g:
+        return []
+    width = _slot_bytes(p, min(len(f), len(g)))
+    product = _pack(f, width) * _pack(g, width) if f is not g else _pack(f, width) ** 2
+    return _unpack(product, len(f) + len(g) - 1, width, p)
+
+
+def sqr(f: list, p: int) -> list:
+    return mul(f, f, p)
+
+
+def divmod_poly(f: list, g: list, p: int) -> tuple:
+    """
+    Returns the quotient and remainder of f by the non-zero polynomial g, by schoolbook division.
+    """
+    if len(f) < len(g):
+        return [], f[:]
+    inv_lead = pow(g[-1], -1, p)
+    remainder = f[:]
+    quotient = [0] * (len(f) - len(g) + 1)
+    for i in range(len(f) - len(g), -1, -1):
+        c = (remainder[i + len(g) - 1] * inv_lead) % p
+        quotient[i] = c
+        if c:
+            for j, coeff in enumerate(g):
+                remainder[i + j] = (remainder[i + j] - c * coeff) % p
+    return trim(quotient), trim(remainder[:len(g) - 1])
+
+
+def monic(f: list, p: int) -> list:
+    return scale(f, pow(f[-1], -1, p), p)
+
+
+def gcd(f: list, g: list, p: int) -> list:
+    """
+    Returns the monic greatest common divisor of f and g.
+    """
+    while g:
+        f, g = g, divmod_poly(f, g, p)[1]
+    return monic(f, p) if f else []
+
+
+def inverse(f: list, m: list, p: int) -> list:
+    """
+    Returns the inverse of f modulo m using the extended Euclidean algorithm. Raises a ValueError if f is not
+    invertible modulo m.
+    """
+    r0, r1 = m[:], divmod_poly(f, m, p)[1]
+    s0, s1 = [], [1]
+    while r1:
+        q, r = divmod_poly(r0, r1, p)
+        r0, r1 = r1, r
+        s0, s1 = s1, sub(s0, mul(q, s1, p), p)
+    if len(r0) != 1:
+        raise ValueError("Polynomial is not invertible modulo the modulus")
+    return scale(s0, pow(r0[0], -1, p), p)
+
+
+def series_inverse(f: list, n: int, p: int) -> list:
+    """
+    Returns the power series inverse of f modulo x^n, for f with non-zero constant term, by Newton iteration:
+        g <- g * (2 - f * g) mod x^(2k).
+    """
+    g = [pow(f[0], -1, p)]
+    k = 1
+    while k < n:
+        k = min(2 * k, n)
+        fg = mul(f[:k], g, p)[:k]
+        correction = sub([2], fg, p)
+        g = mul(g, correction, p)[:k]
+    return trim(g)
+
+
+class Modulus:
+
+    def __init__(self, m: list, p: int):
+        """
+        Arithmetic in F_p[x] / (m) for a polynomial m of degree d >= 1. Products of reduced polynomials have degree
+        at most 2d - 2 and are reduced with two further products (Barrett reduction), using the power series inverse
+        of the reversed monic modulus, which is computed once here.
+        """
+        self.p = p
+        self.m = monic(m, p)
+        self.d = len(self.m) - 1
+        self._quotient_length = max(self.d - 1, 1)
+        self._reversed_inverse = series_inverse(self.m[::-1], self._quotient_length, p)
+
+    def reduce(self, f: list) -> list:
+        """
+        Returns f mod m for f of degree at most 2d - 2.
+        """
+        d, p = self.d, self.p
+        if len(f) <= d:
+            return f
+        excess = len(f) - d
+        if excess <= 4:
+            # Few leading terms: eliminate them one at a time
+            f = f[:]
+            m = self.m
+            for i in range(len(f) - 1, d - 1, -1):
+                c = f[i]
+                if c:
+                    for j in range(d + 1):
+                        f[i - d + j] = (f[i - d + j] - c * m[j]) % p
+            return trim(f[:d])
+
+        # Quotient from the leading coefficients: q = rev(rev(f) * rev(m)^(-1) mod x^k), with k = deg f - d + 1
+        k = excess
+        reversed_quotient = mul(f[:-k - 1:-1], self._reversed_inverse[:k], p)[:k]
+        quotient = trim((reversed_quotient + [0] * (k - len(reversed_quotient)))[::-1])
+        return sub(f[:d], mul(quotient, self.m, p)[:d], p)
+
+    def mul(self, f: list, g: list) -> list:
+        return self.reduce(mul(f, g, self.p))
+
+    def sqr(self, f: list) -> list:
+        return self.reduce(mul(f, f, self.p))
+
+    def pow(self, f: list, e: int) -> list:
+        """
+        Returns f^e mod m by left-to-right square and multiply. Multiplication by the base is cheap when the base has
+        small degree, as for x and x^3 + ax + b.
+        """
+        f = self.reduce(f) if len(f) > self.d else f
+        result = [1]
+        for i in range(e.bit_length() - 1, -1, -1):
+            result = self.sqr(result)
+            if (e >> i) & 1:
+                result = self.mul(result, f)
+        return result
+
+    def inverse(self, f: list) -> list:
+        return inverse(f, self.m, self.p)
@@ -0,0 +1,246 @@
+"""
+On-disk precomputed point tables.
+
+Building the generator tables of a curve is a noticeable part of a worker's start-up, and every worker holds its own
+copy. A table file holds the generator tables of one curve in a fixed binary format. It is generated once offline and
+memory-mapped at start-up, so that all workers share its pages read-only through the page cache; points are decoded
+from the mapping when they are used.
+
+File format, version 1 (integers are little-endian):
+
+    Header, 80 bytes
+        magic           8 bytes     b"CAPTABLE"
+        version         uint16      TABLE_FORMAT_VERSION
+        coord_size      uint16      bytes per coordinate, the byte length of p
+        section_count   uint16
+        reserved        uint16      0
+        curve_digest    32 bytes    SHA-256 of the curve parameters, see curve_digest
+        checksum        32 bytes    SHA-256 of everything after the header
+    Sections, 16 bytes each
+        kind            4 bytes     b"FIXB" for the fixed-base table, b"WNAF" for the odd multiples
+        window          uint16      window width w of the table
+        reserved        uint16      0
+        offset          uint32      byte offset of the first point from the start of the file
+        count           uint32      number of points
+    Points
+        x || y, each coordinate coord_size bytes big-endian, in the order of the lists built by EllipticCurve
+
+Generate the files for every curve with
+    $ python -m src.library.table_store <directory>
+"""
+import hashlib
+import mmap
+import os
+import struct
+from collections.abc import Sequence
+
+from src.library.curves import CurveType, get_curve
+from src.library.ecc import EllipticCurve, GENERATOR_WNAF_WIDTH
+
+TABLE_FORMAT_VERSION = 1
+TABLE_MAGIC = b"CAPTABLE"
+TABLE_SUFFIX = ".tbl"
+
+FIXED_BASE_SECTION = b"FIXB"
+WNAF_SECTION = b"WNAF"
+
+_HEADER = struct.Struct("<8sHHHH32s32s")
+_SECTION = struct.Struct("<4sHHII")
+
+
+class TableFormatError(ValueError):
+    """Raised when a table file is malformed, corrupted, of another version or for another curve."""
+
+
+class MappedPointTable(Sequence):
+    """
+    A read-only list of affine points stored in a table file, decoded on access.
+    """
+
+    def __init__(self, view: memoryview, count: int, coord_size: int):
+        self._view = view
+        self._count = count
+        self._point_size = 2 * coord_size
+        self._shift = 8 * coord_size
+        self._mask = (1 << self._shift) - 1
+
+    def __len__(self):
+        return self._count
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(self._count))]
+        if index < 0:
+            index += self._count
+        if not 0 <= index < self._count:
+            raise IndexError("Point table index out of range")
+
+        # Decode x || y as one integer and split it
+        start = self._point_size * index
+        xy = int.from_bytes(self._view[start:start + self._point_size], "big")
+        return xy >> self._shift, xy & self._mask
+
+
+class TableFile:
+
+    def __init__(self, path: str, curve_type: CurveType | EllipticCurve, verify_checksum: bool = True):
+        """
+        We memory-map the table file at path read-only and validate it against the given curve. Raises a
+        TableFormatError if the file is not a valid table file for the curve; with verify_checksum, the checksum of
+        the whole file is checked as well.
+        """
+        self.path = path
+        self.curve = get_curve(curve_type)
+        self.coord_size = _coord_size(self.curve)
+
+        # An empty file cannot be mapped, so the length is checked first
+        with open(path, "rb") as file:
+            if os.fstat(file.fileno()).st_size < _HEADER.size:
+                raise TableFormatError(f"{path}: file too short for a table header")
+            self._mmap = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        view = memoryview(self._mmap)
+
+        # Header
+        magic, version, coord_size, section_count, _, digest, checksum = _HEADER.unpack_from(view)
+        if magic != TABLE_MAGIC:
+            raise TableFormatError(f"{path}: not a table file")
+        if version != TABLE_FORMAT_VERSION:
+            raise TableFormatError(f"{path}: format version {version} is not supported")
+        if digest != curve_digest(self.curve) or coord_size != self.coord_size:
+            raise TableFormatError(f"{path}: tables are for a different curve")
+        if verify_checksum and hashlib.sha256(view[_HEADER.size:]).digest() != checksum:
+            raise TableFormatError(f"{path}: checksum mismatch")
+
+        # Sections
+        self.sections = {}
+        point_size = 2 * coord_size
+        for i in range(section_count):
+            entry_offset = _HEADER.size + i * _SECTION.size
+            if entry_offset + _SECTION.size > len(view):
+                raise TableFormatError(f"{path}: truncated section table")
+            kind, window, _, offset, count = _SECTION.unpack_from(view, entry_offset)
+            if offset + count * point_size > len(view):
+                raise TableFormatError(f"{path}: section {kind!r} extends past the end of the file")
+            table = MappedPointTable(view[offset:offset + count * point_size], count, coord_size)
+            self.sections[kind] = (window, table)
+
+    def table(self, kind: bytes, window: int) -> MappedPointTable | None:
+        """
+        Returns the table of the given kind if the file holds one for the given window, otherwise None.
+        """
+        window_table = self.sections.get(kind)
+        if window_table is None or window_table[0] != window:
+            return None
+        return window_table[1]
+
+    def install(self):
+        """
+        Uses the tables in the file as the generator tables of the curve, so that they are not built in memory.
+        A table for a window other than the curve's is ignored.
+        """
+        self.curve.use_generator_tables(
+            table=self.table(FIXED_BASE_SECTION, self.curve.generator_window),
+            wnaf_table=self.table(WNAF_SECTION, GENERATOR_WNAF_WIDTH)
+        )
+
+
+def curve_digest(curve: EllipticCurve) -> bytes:
+    """
+    Returns the SHA-256 digest of the curve parameters a, b, p, order, gx and gy, each encoded as an unsigned
+    big-endian integer of the byte length of p (or of the order, if longer).
+    """
+    size = max(_coord_size(curve), (curve.order.bit_length() + 7) // 8)
+    values = (curve.a % curve.p, curve.b % curve.p, curve.p, curve.order) + tuple(curve.generator)
+    return hashlib.sha256(b"".join(value.to_bytes(size, "big") for value in values)).digest()
+
+
+def table_path(directory: str, curve_type: CurveType) -> str:
+    """
+    Returns the path of the table file for the curve type in the given directory.
+    """
+    return os.path.join(directory, curve_type.value + TABLE_SUFFIX)
+
+
+def write_tables(path: str, curve_type: CurveType | EllipticCurve):
+    """
+    Builds the generator tables of the curve and writes them to a table file at path. The file is written under a
+    temporary name and then renamed, so readers never see a partial file.
+    """
+    curve = get_curve(curve_type)
+    coord_size = _coord_size(curve)
+    sections = [
+        (FIXED_BASE_SECTION, curve.generator_window, curve.generator_table()),
+        (WNAF_SECTION, GENERATOR_WNAF_WIDTH, curve.generator_wnaf_table())
+    ]
+
+    # Section table and points
+    body = bytearray()
+    offset = _HEADER.size + len(sections) * _SECTION.size
+    points = bytearray()
+    for kind, window, table in sections:
+        body += _SECTION.pack(kind, window, 0, offset + len(points), len(table))
+        for x, y in table:
+            points += x.to_bytes(coord_size, "big") + y.to_bytes(coord_size, "big")
+    body += points
+
+    header = _HEADER.pack(TABLE_MAGIC, TABLE_FORMAT_VERSION, coord_size, len(sections), 0, curve_digest(curve),
+                          hashlib.sha256(body).digest())
+    temp_path = f"{path}.{os.getpid()}.tmp"
+    with open(temp_path, "wb") as file:
+        file.write(header)
+        file.write(body)
+    os.replace(temp_path, path)
+
+
+def load_tables(directory: str, curve_type: CurveType) -> TableFile | None:
+    """
+    Installs the generator tables from the table file for the curve type in the given directory. Returns the
+    TableFile, or None if the directory has no table file for the curve. Raises a TableFormatError for an invalid
+    file.
+    """
+    path = table_path(directory, curve_type)
+    if not os.path.exists(path):
+        return None
+    table_file = TableFile(path, curve_type)
+    table_file.install()
+    return table_file
+
+
+def _coord_size(curve: EllipticCurve) -> int:
+    return (curve.p.bit_length() + 7) // 8
+
+
+if __name__ == "__main__":
+    # Generate the table files for every curve and compare building the tables with loading them
+    import sys
+    import time
+
+    from src.library.ecc import EllipticCurve as Curve
+
+    if len(sys.argv) != 2:
+        sys.exit("Usage: python -m src.library.table_store <directory>")
+    table_dir = sys.argv[1]
+    os.makedirs(table_dir, exist_ok=True)
+
+    print(f"{'curve':<12}{'size (KB)':>10}{'build (ms)':>12}{'load (ms)':>11}")
+    for curve_type in CurveType:
+        write_tables(table_path(table_dir, curve_type), curve_type)
+        shared = get_curve(curve_type)
+
+        # Fresh contexts, so the tables of the shared context are not reused
+        fresh = Curve(shared.a, shared.b, shared.p, shared.order, shared.generator, shared.generator_window,
+                      shared.endomorphism)
+        start = time.perf_counter()
+        fresh.generator_table()
+        fresh.generator_wnaf_table()
+        build_time = time.perf_counter() - start
+
+        mapped = Curve(shared.a, shared.b, shared.p, shared.order, shared.generator, shared.generator_window,
+                       shared.endomorphism)
+        start = time.perf_counter()
+        TableFile(table_path(table_dir, curve_type), mapped).install()
+        load_time = time.perf_counter() - start
+
+        assert mapped.multiply_generator(12345) == fresh.multiply_generator(12345)
+        size = os.path.getsize(table_path(table_dir, curve_type))
+        print(f"{curve_type.value:<12}{size / 1024:>10.1f}{build_time * 1000:>12.1f}{load_time * 1000:>11.2f}")
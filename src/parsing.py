@@ -0,0 +1,123 @@
+"""
+Request parsing shared by the Flask and async apps, so both serve the same JSON contracts.
+"""
+from src.library.codec import der_decode
+from src.library.data_formats import Data
+from src.library.hash_functions import HashType
+from src.library.merkle import txid_from_hex
+from src.library.point_counting import POINT_COUNTING_MAX_BITS
+
+CURVE_ORDER_MAX_BITS = POINT_COUNTING_MAX_BITS  # Largest prime accepted by /curve_order
+
+
+def parse_signature(data: dict) -> tuple:
+    """
+    Returns the signature (r, s) from the r and s fields of the request data, or from its DER encoded signature.
+    """
+    sig_r = data.get('r')
+    sig_s = data.get('s')
+    der_encoded_sig = data.get('der_sig')
+
+    if (sig_r == "" or sig_s == "") and der_encoded_sig != "":
+        return der_decode(der_encoded_sig)
+    elif sig_r != "" and sig_s != "":
+        return int(sig_r), int(sig_s)
+    else:
+        raise ValueError(f"Missing one or more fields.")
+
+
+def parse_batch_items(signatures: list) -> tuple:
+    """
+    Returns the indices of the well-formed entries of a /verify_batch request along with their task items
+    (signature, hex_string, cpk, recovery_id). Malformed entries are skipped, so the caller reports them as invalid.
+    """
+    indices, items = [], []
+    for index, sig_data in enumerate(signatures):
+        try:
+            message = Data(sig_data.get('message'))
+            signature = parse_signature(sig_data)
+            recovery_id = sig_data.get('recovery_id')
+            recovery_id = int(recovery_id) if recovery_id not in (None, "") else None
+        except (AttributeError, TypeError, ValueError):
+            continue
+        indices.append(index)
+        items.append((signature, message.hex, sig_data.get('cpk'), recovery_id))
+    return indices, items
+
+
+def parse_curve_parameters(data: dict) -> tuple:
+    """
+    Returns the integers (a, b, p) of a /curve_order request, given in decimal or as 0x-prefixed hex. Raises a
+    ValueError if a value is missing or p has more than CURVE_ORDER_MAX_BITS bits.
+    """
+    try:
+        a, b, p = (int(str(data.get(key)), 0) for key in ('a', 'b', 'p'))
+    except (TypeError, ValueError):
+        raise ValueError("Curve parameters a, b and p are required as integers")
+    if p.bit_length() > CURVE_ORDER_MAX_BITS:
+        raise ValueError(f"Point counting is limited to primes of at most {CURVE_ORDER_MAX_BITS} bits")
+    return a, b, p
+
+
+def parse_pubkey_hashes(values: list) -> list:
+    """
+    Returns the 20-byte hashes of a bulk address request given as hex strings, with None for each malformed entry.
+    """
+    hashes = []
+    for value in values:
+        try:
+            pubkey_hash = bytes.fromhex(value[2:] if value.startswith("0x") else value)
+        except (AttributeError, TypeError, ValueError):
+            pubkey_hash = None
+        hashes.append(pubkey_hash if pubkey_hash is not None and len(pubkey_hash) == 20 else None)
+    return hashes
+
+
+def parse_hash_batch(data: dict) -> tuple:
+    """
+    Returns the inputs of a /hash_batch request as a list of Data, read like the input of /hash, and its HashType
+    (default sha256). Raises a ValueError if the inputs are not a list of strings or the hash type is unknown.
+    """
+    inputs = data.get('inputs')
+    if not isinstance(inputs, list) or not all(isinstance(value, str) for value in inputs):
+        raise ValueError("A list of input strings is required.")
+    try:
+        hashtype = HashType(data.get('hash_type', HashType.SHA256.value))
+    except ValueError:
+        raise ValueError(f"Invalid hash type {data.get('hash_type')!r}.")
+    return [Data(value) for value in inputs], hashtype
+
+
+def parse_txids(values: list):
+    """
+    Returns an iterator over the internal byte order of txids given as hex in display order. The txids are decoded
+    as they are read, so a malformed txid raises a ValueError from the iterator.
+    """
+    if not values or not isinstance(values, list):
+        raise ValueError("A list of txids is required.")
+    return map(txid_from_hex, values)
+
+
+def parse_leaf_index(data: dict) -> int:
+    """
+    Returns the non-negative leaf index of a Merkle proof request. Raises a ValueError if it is missing or invalid.
+    """
+    try:
+        index = int(data.get('index'))
+    except (TypeError, ValueError):
+        index = -1
+    if index < 0:
+        raise ValueError("A non-negative integer leaf index is required.")
+    return index
+
+
+def parse_merkle_proof(data: dict) -> tuple:
+    """
+    Returns the (txid, index, proof, merkle_root) of a /verify_merkle_proof request, with the txid, the proof hashes
+    and the root given as hex in display order. Raises a ValueError for a missing or malformed field.
+    """
+    proof = data.get('proof')
+    if not isinstance(proof, list):
+        raise ValueError("A list of proof hashes is required.")
+    return txid_from_hex(data.get('txid')), parse_leaf_index(data), [txid_from_hex(value) for value in proof], \
+        txid_from_hex(data.get('merkle_root'))
@@ -0,0 +1,152 @@
+"""
+CPU-bound crypto tasks for the API endpoints.
+
+Tasks take and return plain picklable values, so they can run inline or in a worker process (see executor.py). Each
+task looks up its curve in the registry, so a worker builds curve contexts and tables once and reuses them.
+"""
+import logging
+import os
+
+from src.library import ecdsa
+from src.library.codec import decompress_public_key
+from src.library.curves import CurveType, get_curve
+from src.library.ecc_keys import KeyPair, generate_keypairs
+from src.library.ecdsa import VerificationPolicy, generate_recoverable_signature, set_verification_policy, \
+    verify_signature, verify_signatures_batch
+from src.library.key_cache import PublicKeyCache
+from src.library.nonce_pool import NoncePool
+from src.library.point_counting import count_points
+from src.library.table_store import load_tables
+
+# Nonce pools, public key caches and memory-mapped table files of this process, by curve type
+_NONCE_POOLS = {}
+_KEY_CACHES = {}
+_TABLE_FILES = {}
+
+logger = logging.getLogger(__name__)
+
+
+def warm_up(curve_types: tuple, nonce_pool_size: int = 0, verification_policy: VerificationPolicy | None = None,
+            key_cache_size: int = 0, table_dir: str | None = None, start_nonce_pools: bool = True):
+    """
+    Builds the curve contexts and generator tables for the given curve types. With a table_dir, the generator tables
+    are memory-mapped from the table files in that directory instead (see table_store); a curve without a valid
+    file has its tables built. With a positive nonce_pool_size, also creates a nonce pool of that size for each curve
+    type, used by sign_task; the pools are filled from now on if start_nonce_pools is set, otherwise from the first
+    signature. A verification_policy replaces the signing self-check policy of this process. With a positive
+    key_cache_size, the verify tasks look up public keys in a cache of that size for each curve type.
+    """
+    if verification_policy is not None:
+        set_verification_policy(verification_policy)
+    for curve_type in curve_types:
+        curve = get_curve(curve_type)
+        if table_dir and curve_type not in _TABLE_FILES:
+            try:
+                _TABLE_FILES[curve_type] = load_tables(table_dir, curve_type)
+            except (OSError, ValueError) as error:
+                # A TableFormatError is a ValueError; an unusable table file never stops the process from starting
+                logger.warning(f"Building tables for {curve_type.value}: {error}")
+        curve.generator_table()
+        curve.generator_wnaf_table()
+        curve.generator_phi_table()
+        if nonce_pool_size > 0 and curve_type not in _NONCE_POOLS:
+            nonce_pool = NoncePool(curve_type, size=nonce_pool_size)
+            if start_nonce_pools:
+                nonce_pool.start()
+            _NONCE_POOLS[curve_type] = nonce_pool
+        if key_cache_size > 0 and curve_type not in _KEY_CACHES:
+            _KEY_CACHES[curve_type] = PublicKeyCache(curve_type, size=key_cache_size)
+
+
+def stop_nonce_pools():
+    """
+    Stops the nonce pools of this process, discarding their nonces.
+    """
+    while _NONCE_POOLS:
+        _, nonce_pool = _NONCE_POOLS.popitem()
+        nonce_pool.stop()
+
+
+def public_keys_task(private_key: int, curve_type: CurveType) -> tuple:
+    """
+    Returns the public key point and compressed public key for the private key.
+    """
+    kp = KeyPair(private_key=private_key, curve_type=curve_type)
+    return kp.public_key_point, kp.compressed_public_key
+
+
+def keypairs_task(count: int, curve_type: CurveType, start: int | None = None) -> list:
+    """
+    Returns count tuples (private_key, public_key_point, compressed_public_key). See ecc_keys.generate_keypairs.
+    """
+    return [
+        (kp.private_key, kp.public_key_point, kp.compressed_public_key)
+        for kp in generate_keypairs(count, curve_type, start=start)
+    ]
+
+
+def sign_task(private_key: int, hex_string: str, curve_type: CurveType) -> tuple:
+    """
+    Returns the signature (r, s, recovery_id) of the hex string, using the nonce pool for the curve if there is one.
+    """
+    nonce_pool = _NONCE_POOLS.get(curve_type)
+    if nonce_pool is not None:
+        nonce_pool.start()
+    return generate_recoverable_signature(private_key, hex_string, curve_type, nonce_pool=nonce_pool)
+
+
+def curve_order_task(a: int, b: int, p: int) -> int:
+    """
+    Returns the number of points of the curve y^2 = x^3 + ax + b over F_p. See point_counting.count_points.
+    """
+    return count_points(a, b, p)
+
+
+def stats_task() -> dict:
+    """
+    Returns the signing self-check and public key cache counters of the process running the task.
+    """
+    return {
+        'pid': os.getpid(),
+        'sign_check': ecdsa.verification_policy.stats(),
+        'key_cache': {curve_type.value: cache.stats() for curve_type, cache in _KEY_CACHES.items()}
+    }
+
+
+def _public_key(cpk: str, curve_type: CurveType) -> tuple:
+    """
+    Returns the public key point and its PointTable (or None) for the compressed public key, using the public key
+    cache for the curve if there is one.
+    """
+    cache = _KEY_CACHES.get(curve_type)
+    if cache is not None:
+        return cache.get(cpk)
+    return decompress_public_key(cpk, curve_type), None
+
+
+def verify_task(signature: tuple, hex_string: str, cpk: str, curve_type: CurveType) -> bool:
+    """
+    Returns True if the signature of the hex string is valid for the compressed public key.
+    """
+    public_key, public_key_table = _public_key(cpk, curve_type)
+    return verify_signature(signature, hex_string, public_key, curve_type, public_key_table=public_key_table)
+
+
+def verify_batch_task(items: list, curve_type: CurveType) -> list:
+    """
+    Verifies items (signature, hex_string, cpk, recovery_id), returning one boolean per item. Items whose compressed
+    public key cannot be decompressed are invalid.
+    """
+    results = [False] * len(items)
+    indices, batch = [], []
+    for index, (signature, hex_string, cpk, recovery_id) in enumerate(items):
+        try:
+            public_key, _ = _public_key(cpk, curve_type)
+        except (AttributeError, TypeError, ValueError):
+            continue
+        indices.append(index)
+        batch.append((signature, hex_string, public_key, recovery_id))
+
+    for index, is_valid in zip(indices, verify_signatures_batch(batch, curve_type)):
+        results[index] = is_valid
+    return results